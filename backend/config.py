@@ -26,6 +26,12 @@ class Settings:
     
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./sec_filings.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "40"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds
+    
+    # Task queue (Celery broker and result backend)
+    REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     
     # AI Models
     GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY")
@@ -39,6 +45,7 @@ class Settings:
     # API Settings
     API_HOST: str = os.getenv("API_HOST", "localhost")
     API_PORT: int = int(os.getenv("API_PORT", "8000"))
+    API_WORKERS: int = int(os.getenv("API_WORKERS", str(os.cpu_count() or 1)))
     DEBUG: bool = os.getenv("DEBUG", "false").lower() == "true"
     
     # Logging
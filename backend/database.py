@@ -1,24 +1,76 @@
 """
 Database models and setup for SEC Filing Analyzer (Simplified)
 """
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy import create_engine, column, event, func, inspect, select, text, Column, Index, Integer, String, DateTime, Text, Boolean, ForeignKey
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session, relationship
+from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
 import json
 import hashlib
-from typing import Dict, List, Optional, Any
+import re
+from typing import Dict, List, Optional, Tuple, Any
 import logging
 
 from config import settings
 
 logger = logging.getLogger(__name__)
 
-# Database setup
-engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+def get_async_database_url(database_url: str) -> str:
+    """Map a sync DATABASE_URL onto the matching async driver"""
+    if database_url.startswith("sqlite:///"):
+        return database_url.replace("sqlite:///", "sqlite+aiosqlite:///", 1)
+    if database_url.startswith(("postgresql://", "postgresql+psycopg2://")):
+        return "postgresql+asyncpg://" + database_url.split("://", 1)[1]
+    return database_url
+
+def get_engine_options(database_url: str) -> Dict[str, Any]:
+    """Driver-specific create_engine() options for the sync engine"""
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql" and url.get_driver_name() == "psycopg2":
+        # Batch executemany() (UPDATE/DELETE as well as INSERT) with psycopg2's
+        # execute_batch, and send bulk inserts as large multi-row VALUES pages
+        return {
+            "executemany_mode": "values_plus_batch",
+            "insertmanyvalues_page_size": 10_000
+        }
+    return {}
+
+# Database setup (sync engine for scripts and DatabaseManager)
+engine = create_engine(settings.DATABASE_URL, echo=settings.DEBUG, **get_engine_options(settings.DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine for the API so DB calls don't block the event loop.
+# aiosqlite runs without a connection pool, so pool sizing only applies to server databases.
+ASYNC_DATABASE_URL = get_async_database_url(settings.DATABASE_URL)
+async_pool_options = {} if ASYNC_DATABASE_URL.startswith("sqlite") else {
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW
+}
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=settings.DEBUG,
+    pool_pre_ping=True,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    **async_pool_options
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, expire_on_commit=False)
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Use WAL so writes don't block readers, only fsync at checkpoints, and keep temp tables in memory"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+if engine.dialect.name == "sqlite":
+    event.listen(engine, "connect", set_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", set_sqlite_pragmas)
+
 class Company(Base):
     """Company model for tracking companies we analyze"""
     __tablename__ = "companies"
@@ -67,7 +119,10 @@ class Filing(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
-
+    # Company filing lists filter by company and sort newest first
+    __table_args__ = (
+        Index('idx_filings_company_date', company_id, filing_date.desc()),
+    )
     
     # Relationships
     company = relationship("Company", back_populates="filings")
@@ -111,6 +166,11 @@ class FilingSection(Base):
     company_context = Column(String(200))  # company name for RAG context
     content_hash = Column(String(64))  # for deduplication
     
+    # Section lookups are by filing and section type
+    __table_args__ = (
+        Index('idx_sections_filing_type', filing_id, section_type),
+    )
+    
     # Relationships
     filing = relationship("Filing", back_populates="sections")
     
@@ -219,23 +279,240 @@ class Analysis(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None
         }
 
+def is_substantial(content: Optional[str], min_length: int = 50) -> bool:
+    """
+    Whether content is longer than min_length once surrounding whitespace is dropped
+    
+    Same result as len(content.strip()) > min_length, but only the whitespace at
+    each end is scanned, so multi-MB sections aren't copied just to be measured.
+    """
+    if not content or len(content) <= min_length or content.isspace():
+        return False
+    
+    start, end = 0, len(content)
+    while content[start].isspace():
+        start += 1
+    while content[end - 1].isspace():
+        end -= 1
+    return end - start > min_length
+
+def section_row(filing_id: int, section_type: str, content: str,
+                section_title: str = None, chunk_type: str = "text_chunk",
+                standard_type: str = None, company_context: str = None) -> Dict[str, Any]:
+    """Build the column values for a filing section, content hash included"""
+    return {
+        "filing_id": filing_id,
+        "section_type": section_type,
+        "section_title": section_title,
+        "content": content,
+        "chunk_type": chunk_type,
+        "standard_type": standard_type or section_type,
+        "company_context": company_context,
+        # Hash for deduplication
+        "content_hash": hashlib.sha256(content.encode()).hexdigest()[:16] if content else None
+    }
+
+def build_section(filing_id: int, section_type: str, content: str,
+                  section_title: str = None, chunk_type: str = "text_chunk",
+                  standard_type: str = None, company_context: str = None) -> FilingSection:
+    """Build an unsaved filing section with its content hash filled in"""
+    return FilingSection(**section_row(
+        filing_id, section_type, content,
+        section_title=section_title,
+        chunk_type=chunk_type,
+        standard_type=standard_type,
+        company_context=company_context
+    ))
+
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
     logger.info("Database tables created successfully")
 
-def get_db() -> Session:
-    """Get database session"""
-    db = SessionLocal()
-    try:
+def add_missing_columns(conn, table_name: str, columns: List[Tuple[str, str]]) -> List[str]:
+    """
+    Add the columns a table doesn't have yet in one schema change
+    
+    Existing columns are looked up first instead of letting ALTER TABLE fail.
+    Postgres gets a single ALTER TABLE (one lock); SQLite only accepts one
+    ADD COLUMN per statement, so it gets one ALTER per column. Call inside
+    engine.begin() so the change commits or rolls back as a whole.
+    
+    Args:
+        conn: Connection with an open transaction
+        table_name: Table to alter
+        columns: (column name, SQL type) pairs
+        
+    Returns:
+        Names of the columns that were added
+    """
+    existing = {col['name'] for col in inspect(conn).get_columns(table_name)}
+    missing = [(name, sql_type) for name, sql_type in columns if name not in existing]
+    if not missing:
+        return []
+    
+    clauses = [f"ADD COLUMN {name} {sql_type}" for name, sql_type in missing]
+    if conn.dialect.name == "sqlite":
+        for clause in clauses:
+            conn.execute(text(f"ALTER TABLE {table_name} {clause}"))
+    else:
+        conn.execute(text(f"ALTER TABLE {table_name} {', '.join(clauses)}"))
+    
+    return [name for name, _ in missing]
+
+# Full-text index on company names: a generated tsvector + GIN index on Postgres,
+# an external-content FTS5 table kept in sync by triggers on SQLite
+SEARCH_INDEX_DDL = {
+    "postgresql": [
+        "ALTER TABLE companies ADD COLUMN IF NOT EXISTS name_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', name)) STORED",
+        "CREATE INDEX IF NOT EXISTS companies_name_tsv_idx ON companies USING GIN (name_tsv)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS companies_fts "
+        "USING fts5(name, content='companies', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS companies_fts_ai AFTER INSERT ON companies BEGIN "
+        "INSERT INTO companies_fts(rowid, name) VALUES (new.id, new.name); END",
+        "CREATE TRIGGER IF NOT EXISTS companies_fts_ad AFTER DELETE ON companies BEGIN "
+        "INSERT INTO companies_fts(companies_fts, rowid, name) VALUES ('delete', old.id, old.name); END",
+        "CREATE TRIGGER IF NOT EXISTS companies_fts_au AFTER UPDATE OF name ON companies BEGIN "
+        "INSERT INTO companies_fts(companies_fts, rowid, name) VALUES ('delete', old.id, old.name); "
+        "INSERT INTO companies_fts(rowid, name) VALUES (new.id, new.name); END",
+        "INSERT INTO companies_fts(companies_fts) VALUES ('rebuild')",
+    ],
+}
+
+def create_search_index():
+    """Create the company name full-text index for the current database (safe to re-run)"""
+    statements = SEARCH_INDEX_DDL.get(engine.dialect.name)
+    if not statements:
+        logger.warning(f"No full-text index support for {engine.dialect.name}, search will use ILIKE")
+        return
+    
+    if not inspect(engine).has_table("companies"):
+        logger.warning("No companies table yet, skipping the search index")
+        return
+    
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    logger.info("Company search index created successfully")
+
+def company_name_match(query: str):
+    """Build a WHERE clause matching company names by word prefix via the full-text index
+    
+    Each query word must start a word in the name: 'micro' matches "Microsoft
+    Corp" but 'soft' doesn't. Only dialects without an index fall back to a
+    substring ILIKE.
+    
+    Args:
+        query: Free-text search string
+        
+    Returns:
+        SQL expression to filter Company rows, or None if the query has no searchable words
+    """
+    terms = re.findall(r"\w+", query)
+    if not terms:
+        return None
+    
+    if engine.dialect.name == "postgresql":
+        return text("companies.name_tsv @@ to_tsquery('simple', :name_query)").bindparams(
+            name_query=" & ".join(f"{term}:*" for term in terms)
+        )
+    
+    if engine.dialect.name == "sqlite":
+        matches = text("SELECT rowid FROM companies_fts WHERE companies_fts MATCH :name_query").bindparams(
+            name_query=" ".join(f'"{term}"*' for term in terms)
+        )
+        return Company.id.in_(matches.columns(column("rowid", Integer)))
+    
+    return Company.name.ilike(f"%{query}%")
+
+def section_previews_stmt(filing_ids: List[int], section_type: str, preview_chars: int = 500):
+    """Build the select of section lengths and previews used to compare filings
+    
+    Only the length and the first preview_chars characters of each section are
+    selected, so full section text never leaves the database.
+    
+    Args:
+        filing_ids: Filings to compare (rendered as an IN list)
+        section_type: Section to compare, e.g. 'risk_factors'
+        preview_chars: Length of the content preview
+        
+    Returns:
+        Column select of filing_id, content_length and content_preview
+    """
+    return select(
+        FilingSection.filing_id,
+        func.coalesce(func.length(FilingSection.content), 0).label('content_length'),
+        func.substr(FilingSection.content, 1, preview_chars).label('content_preview')
+    ).where(
+        FilingSection.filing_id.in_(filing_ids),
+        FilingSection.section_type == section_type
+    ).order_by(FilingSection.id)
+
+def compile_for_asyncpg(stmt, dialect) -> Optional[Tuple[str, List[Any]]]:
+    """
+    Compile a Core select to SQL and positional arguments for asyncpg's fetch()
+    
+    Expanding parameters (IN lists) are rendered into individual $n
+    placeholders. Statements whose bind values or result columns need
+    SQLAlchemy type processing can't bypass it, so they return None.
+    
+    Args:
+        stmt: Column select (not ORM entities)
+        dialect: asyncpg dialect of the connection
+        
+    Returns:
+        (sql, params), or None if the statement must run through SQLAlchemy
+    """
+    compiled = stmt.compile(dialect=dialect, compile_kwargs={"render_postcompile": True})
+    
+    for bind in compiled.binds.values():
+        if bind.type.dialect_impl(dialect).bind_processor(dialect) is not None:
+            return None
+    for selected in stmt.selected_columns:
+        if selected.type.dialect_impl(dialect).result_processor(dialect, None) is not None:
+            return None
+    
+    return str(compiled), [compiled.params[name] for name in compiled.positiontup]
+
+async def fetch_mappings(db: AsyncSession, stmt) -> List[Dict[str, Any]]:
+    """
+    Run a Core select and return its rows as plain dicts
+    
+    On asyncpg the compiled statement goes straight to the driver's fetch(),
+    skipping SQLAlchemy's row construction and result processing, unless
+    compile_for_asyncpg() says the statement needs that processing.
+    
+    Args:
+        db: Async session
+        stmt: Column select (not ORM entities)
+        
+    Returns:
+        List of row dictionaries keyed by column label
+    """
+    conn = await db.connection()
+    compiled = compile_for_asyncpg(stmt, conn.dialect) if conn.dialect.driver == "asyncpg" else None
+    if compiled is None:
+        result = await conn.execute(stmt)
+        return [dict(row) for row in result.mappings()]
+    
+    sql, params = compiled
+    raw_connection = await conn.get_raw_connection()
+    records = await raw_connection.driver_connection.fetch(sql, *params)
+    return [dict(record) for record in records]
+
+async def get_db() -> AsyncSession:
+    """Get async database session"""
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 def init_database():
     """Initialize database with tables"""
     logger.info("Initializing database...")
     create_tables()
+    create_search_index()
     logger.info("Database initialized successfully")
 
 class DatabaseManager:
@@ -263,6 +540,44 @@ class DatabaseManager:
         
         return company
     
+    def upsert_company(self, name: str, cik: str, symbol: str = None) -> int:
+        """
+        Insert a company or refresh its name and symbol, without committing
+        
+        Runs as a single INSERT ... ON CONFLICT (cik) statement on SQLite and
+        PostgreSQL, so it can share a transaction with the writes that follow.
+        
+        Args:
+            name: Company name
+            cik: Company CIK
+            symbol: Ticker symbol (an existing symbol is kept when None)
+            
+        Returns:
+            The company's id
+        """
+        dialect_insert = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}.get(self.db.bind.dialect.name)
+        if dialect_insert is None:
+            company = self.db.query(Company).filter(Company.cik == cik).first()
+            if not company:
+                company = Company(name=name, cik=cik, symbol=symbol)
+                self.db.add(company)
+            else:
+                company.name = name
+                company.symbol = symbol or company.symbol
+            self.db.flush()
+            return company.id
+        
+        stmt = dialect_insert(Company).values(name=name, cik=cik, symbol=symbol)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Company.cik],
+            set_={
+                'name': stmt.excluded.name,
+                'symbol': func.coalesce(stmt.excluded.symbol, Company.symbol),
+                'updated_at': datetime.utcnow()
+            }
+        ).returning(Company.id)
+        return self.db.execute(stmt).scalar_one()
+    
     def get_company_by_cik(self, cik: str) -> Optional[Company]:
         """Get company by CIK"""
         return self.db.query(Company).filter(Company.cik == cik).first()
@@ -272,19 +587,24 @@ class DatabaseManager:
         return self.db.query(Company).all()
     
     def create_filing(self, company_id: int, form_type: str, filing_date: datetime, 
-                     accession_number: str, document_url: str = None) -> Filing:
-        """Create new filing record"""
+                     accession_number: str, document_url: str = None,
+                     html_file_path: str = None, commit: bool = True) -> Filing:
+        """Create new filing record (commit=False leaves it flushed in the open transaction)"""
         filing = Filing(
             company_id=company_id,
             form_type=form_type,
             filing_date=filing_date,
             accession_number=accession_number,
-            document_url=document_url
+            document_url=document_url,
+            html_file_path=html_file_path
         )
         
         self.db.add(filing)
-        self.db.commit()
-        self.db.refresh(filing)
+        if commit:
+            self.db.commit()
+            self.db.refresh(filing)
+        else:
+            self.db.flush()
         
         logger.info(f"Created new filing: {form_type} for company_id {company_id}")
         return filing
@@ -306,19 +626,14 @@ class DatabaseManager:
                       section_title: str = None, chunk_type: str = "text_chunk",
                       standard_type: str = None, company_context: str = None) -> FilingSection:
         """Create new filing section"""
-        section = FilingSection(
-            filing_id=filing_id,
-            section_type=section_type,
+        section = build_section(
+            filing_id, section_type, content,
             section_title=section_title,
-            content=content,
             chunk_type=chunk_type,
-            standard_type=standard_type or section_type,
+            standard_type=standard_type,
             company_context=company_context
         )
         
-        # Generate content hash for deduplication
-        section.content_hash = section.generate_content_hash()
-        
         self.db.add(section)
         self.db.commit()
         self.db.refresh(section)
@@ -382,7 +697,10 @@ class DatabaseManager:
         query = self.db.query(Filing).join(Company)
         
         if company_name:
-            query = query.filter(Company.name.ilike(f"%{company_name}%"))
+            name_match = company_name_match(company_name)
+            if name_match is None:
+                return []
+            query = query.filter(name_match)
         
         if form_type:
             query = query.filter(Filing.form_type == form_type)
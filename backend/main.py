@@ -1,29 +1,47 @@
 """
 FastAPI application for SEC Filing Analyzer
 """
-from fastapi import FastAPI, HTTPException, Depends, Query, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.pool import QueuePool
 from typing import List, Optional, Dict, Any
+from typing_extensions import Annotated
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+import asyncio
 import logging
+import time
 from datetime import datetime
-import asyncio
+import xxhash
 
-from database import get_db, DatabaseManager, Company, Filing, FilingSection, Analysis
-from services.sec_client import SECClient
-from services.parser import FilingParser
+from database import get_db, async_engine, AsyncSessionLocal, company_name_match, create_search_index, fetch_mappings, section_previews_stmt, Company, Filing, FilingSection, Analysis
+from tasks import parse_filing_task, sync_company_filings_task
 from config import settings
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Make sure the company search index exists before serving /search"""
+    # Databases created before the index was added don't have it yet
+    await asyncio.to_thread(create_search_index)
+    yield
+
 # Initialize FastAPI app
 app = FastAPI(
     title="SEC Filing Analyzer API",
     description="API for analyzing SEC filings with AI-powered insights",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -35,8 +53,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global clients
-sec_client = SECClient()
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (a tag list or *) against etag, using weak comparison"""
+    if not if_none_match:
+        return False
+    
+    opaque_tag = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == opaque_tag:
+            return True
+    return False
+
+@app.middleware("http")
+async def etag_middleware(request: Request, call_next):
+    """Tag successful GET responses with an ETag and answer 304 when it matches"""
+    response = await call_next(request)
+    if request.method != "GET" or response.status_code != 200:
+        return response
+    
+    # Only JSON bodies are buffered and hashed; streamed text passes straight through
+    if not response.headers.get("content-type", "").startswith("application/json"):
+        return response
+    
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    etag = f'W/"{xxhash.xxh64(body).hexdigest()}"'
+    
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        not_modified_headers = {"ETag": etag}
+        if "cache-control" in response.headers:
+            not_modified_headers["Cache-Control"] = response.headers["cache-control"]
+        return Response(status_code=304, headers=not_modified_headers)
+    
+    headers = dict(response.headers)
+    headers["ETag"] = etag
+    return Response(content=body, status_code=200, headers=headers, media_type=response.media_type)
+
+# Compress larger bodies; added last so it wraps the ETag middleware and compresses tagged responses
+app.add_middleware(GZipMiddleware, minimum_size=500)
+
+# Short shared-cache lifetime for list endpoints
+LIST_CACHE_CONTROL = "public, max-age=30, stale-while-revalidate=60"
+
+# Request-scoped async database session
+DbSession = Annotated[AsyncSession, Depends(get_db)]
+
+# Request bodies
+class CompanyCreate(BaseModel):
+    """Payload for creating a company"""
+    name: str
+    cik: str
+    symbol: Optional[str] = None
+
+class CompareRequest(BaseModel):
+    """Payload for comparing sections across filings"""
+    filing_ids: List[int]
+
+# Characters of section content read from the database per streamed chunk
+SECTION_STREAM_CHUNK_CHARS = 256 * 1024
+
+# Columns returned by the list endpoints (mirrors the models' to_dict())
+COMPANY_LIST_COLUMNS = (
+    Company.id, Company.name, Company.cik, Company.symbol,
+    Company.industry, Company.sector, Company.created_at, Company.updated_at
+)
+FILING_LIST_COLUMNS = (
+    Filing.id, Filing.company_id, Filing.form_type, Filing.filing_date,
+    Filing.period_end_date, Filing.accession_number, Filing.document_url,
+    Filing.processed, Filing.created_at, Filing.updated_at
+)
+
+# Companies change rarely, so their rows are cached per worker for a short time
+COMPANY_CACHE_SIZE = 1024
+COMPANY_CACHE_TTL = 60  # seconds
+_company_cache = OrderedDict()
+
+async def get_company_data(db: AsyncSession, company_id: int) -> Optional[Dict[str, Any]]:
+    """Read-through LRU/TTL cache of company rows keyed by id"""
+    cached = _company_cache.get(company_id)
+    if cached and cached[0] > time.monotonic():
+        _company_cache.move_to_end(company_id)
+        return cached[1]
+    
+    result = await db.execute(select(*COMPANY_LIST_COLUMNS).where(Company.id == company_id))
+    row = result.mappings().first()
+    if row is None:
+        return None
+    
+    company = dict(row)
+    _company_cache[company_id] = (time.monotonic() + COMPANY_CACHE_TTL, company)
+    _company_cache.move_to_end(company_id)
+    while len(_company_cache) > COMPANY_CACHE_SIZE:
+        _company_cache.popitem(last=False)
+    return company
+
+def invalidate_company(company_id: int):
+    """Drop a company from the cache after it is written"""
+    _company_cache.pop(company_id, None)
 
 @app.get("/")
 async def root():
@@ -55,43 +168,67 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint"""
-    return {
+    """Health check endpoint that pings the database and reports pool usage"""
+    pool = async_engine.pool
+    health = {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
-        "database": "connected"
+        "database": "connected",
+        "pool": {"class": type(pool).__name__}
     }
+    if isinstance(pool, QueuePool):
+        health["pool"].update(size=pool.size(), checked_out=pool.checkedout(), overflow=pool.overflow())
+    
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        logger.error(f"Database health check failed: {str(e)}")
+        health["status"] = "unhealthy"
+        health["database"] = "unavailable"
+        return ORJSONResponse(status_code=503, content=health)
+    
+    return health
 
 # Company endpoints
 @app.get("/companies", response_model=List[Dict[str, Any]])
-async def get_companies(db: Session = Depends(get_db)):
+async def get_companies(response: Response, db: DbSession):
     """Get all companies"""
+    response.headers["Cache-Control"] = LIST_CACHE_CONTROL
     try:
-        companies = db.query(Company).all()
-        return [company.to_dict() for company in companies]
+        return await fetch_mappings(db, select(*COMPANY_LIST_COLUMNS))
     except Exception as e:
         logger.error(f"Error fetching companies: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch companies")
 
 @app.get("/companies/{company_id}", response_model=Dict[str, Any])
-async def get_company(company_id: int, db: Session = Depends(get_db)):
+async def get_company(company_id: int, db: DbSession):
     """Get a specific company"""
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = await get_company_data(db, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
-    return company.to_dict()
+    return company
 
 @app.post("/companies", response_model=Dict[str, Any])
-async def create_company(company_data: Dict[str, str], db: Session = Depends(get_db)):
+async def create_company(company_data: CompanyCreate, db: DbSession):
     """Create a new company"""
     try:
-        with DatabaseManager() as db_manager:
-            company = db_manager.get_or_create_company(
-                name=company_data['name'],
-                cik=company_data['cik'],
-                symbol=company_data.get('symbol')
+        result = await db.execute(select(Company).where(Company.cik == company_data.cik))
+        company = result.scalar_one_or_none()
+        
+        if not company:
+            company = Company(
+                name=company_data.name,
+                cik=company_data.cik,
+                symbol=company_data.symbol
             )
-            return company.to_dict()
+            db.add(company)
+            await db.commit()
+            await db.refresh(company)
+            invalidate_company(company.id)
+            logger.info(f"Created new company: {company.name} (CIK: {company.cik})")
+        
+        return company.to_dict()
     except Exception as e:
         logger.error(f"Error creating company: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to create company")
@@ -99,274 +236,232 @@ async def create_company(company_data: Dict[str, str], db: Session = Depends(get
 # Filing endpoints
 @app.get("/filings", response_model=List[Dict[str, Any]])
 async def get_filings(
-    company_id: Optional[int] = Query(None),
-    form_type: Optional[str] = Query(None),
-    limit: int = Query(50, le=100),
-    db: Session = Depends(get_db)
+    response: Response,
+    db: DbSession,
+    company_id: Annotated[Optional[int], Query()] = None,
+    form_type: Annotated[Optional[str], Query()] = None,
+    limit: Annotated[int, Query(le=100)] = 50
 ):
     """Get filings with optional filtering"""
+    response.headers["Cache-Control"] = LIST_CACHE_CONTROL
     try:
-        query = db.query(Filing)
+        stmt = select(*FILING_LIST_COLUMNS)
         
         if company_id:
-            query = query.filter(Filing.company_id == company_id)
+            stmt = stmt.where(Filing.company_id == company_id)
         
         if form_type:
-            query = query.filter(Filing.form_type == form_type)
+            stmt = stmt.where(Filing.form_type == form_type)
         
-        filings = query.order_by(Filing.filing_date.desc()).limit(limit).all()
-        return [filing.to_dict() for filing in filings]
+        return await fetch_mappings(db, stmt.order_by(Filing.filing_date.desc()).limit(limit))
     except Exception as e:
         logger.error(f"Error fetching filings: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch filings")
 
 @app.get("/filings/{filing_id}", response_model=Dict[str, Any])
-async def get_filing(filing_id: int, db: Session = Depends(get_db)):
+async def get_filing(filing_id: int, db: DbSession):
     """Get a specific filing with its sections"""
-    filing = db.query(Filing).filter(Filing.id == filing_id).first()
-    if not filing:
+    filings = await fetch_mappings(db, select(*FILING_LIST_COLUMNS).where(Filing.id == filing_id))
+    if not filings:
         raise HTTPException(status_code=404, detail="Filing not found")
     
-    # Get sections for this filing
-    sections = db.query(FilingSection).filter(FilingSection.filing_id == filing_id).all()
-    
-    filing_data = filing.to_dict()
-    filing_data['sections'] = [
-        {
-            'id': section.id,
-            'section_type': section.section_type,
-            'section_title': section.section_title,
-            'content_length': len(section.content) if section.content else 0,
-            'has_content': bool(section.content)
-        }
-        for section in sections
-    ]
+    # Section sizes are computed in SQL so the content itself never leaves the database
+    content_length = func.coalesce(func.length(FilingSection.content), 0)
+    filing_data = filings[0]
+    filing_data['sections'] = await fetch_mappings(
+        db,
+        select(
+            FilingSection.id, FilingSection.section_type, FilingSection.section_title,
+            content_length.label('content_length'),
+            (content_length > 0).label('has_content')
+        ).where(FilingSection.filing_id == filing_id).order_by(FilingSection.id)
+    )
     
     return filing_data
 
 @app.get("/filings/{filing_id}/sections/{section_type}")
 async def get_filing_section(
-    filing_id: int, 
-    section_type: str, 
-    db: Session = Depends(get_db)
+    filing_id: int,
+    section_type: str,
+    db: DbSession,
+    truncate: Annotated[Optional[int], Query(ge=1)] = None
 ):
-    """Get a specific section of a filing"""
-    section = db.query(FilingSection).filter(
-        FilingSection.filing_id == filing_id,
-        FilingSection.section_type == section_type
-    ).first()
+    """Get a specific section of a filing, optionally truncated to the first N characters"""
+    content = FilingSection.content
+    if truncate:
+        content = func.substr(FilingSection.content, 1, truncate)
+    
+    result = await db.execute(
+        select(
+            FilingSection.id, FilingSection.filing_id, FilingSection.section_type,
+            FilingSection.section_title, content.label('content'),
+            FilingSection.processed_content, FilingSection.created_at
+        ).where(
+            FilingSection.filing_id == filing_id,
+            FilingSection.section_type == section_type
+        )
+    )
+    section = result.mappings().first()
     
     if not section:
         raise HTTPException(status_code=404, detail="Section not found")
     
     return {
-        'id': section.id,
-        'filing_id': section.filing_id,
-        'section_type': section.section_type,
-        'section_title': section.section_title,
-        'content': section.content,
-        'processed_content': section.processed_content,
-        'created_at': section.created_at.isoformat()
+        **section,
+        'created_at': section['created_at'].isoformat()
     }
 
+@app.get("/filings/{filing_id}/sections/{section_type}/content")
+async def stream_filing_section_content(
+    filing_id: int,
+    section_type: str,
+    db: DbSession
+):
+    """Stream a section's full text as plain text without loading it all into memory"""
+    result = await db.execute(
+        select(FilingSection.id, func.length(FilingSection.content)).where(
+            FilingSection.filing_id == filing_id,
+            FilingSection.section_type == section_type
+        )
+    )
+    row = result.first()
+    
+    if not row:
+        raise HTTPException(status_code=404, detail="Section not found")
+    
+    section_id, content_length = row
+    
+    async def content_chunks():
+        # Own session: the request's session may be closed before streaming finishes
+        async with AsyncSessionLocal() as stream_db:
+            for start in range(1, (content_length or 0) + 1, SECTION_STREAM_CHUNK_CHARS):
+                chunk = await stream_db.scalar(
+                    select(func.substr(FilingSection.content, start, SECTION_STREAM_CHUNK_CHARS))
+                    .where(FilingSection.id == section_id)
+                )
+                yield chunk or ''
+    
+    return StreamingResponse(content_chunks(), media_type="text/plain")
+
 @app.post("/filings/{filing_id}/parse")
-async def parse_filing(filing_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def parse_filing(filing_id: int, db: DbSession):
     """Parse a filing to extract sections"""
-    filing = db.query(Filing).filter(Filing.id == filing_id).first()
+    result = await db.execute(select(Filing).where(Filing.id == filing_id))
+    filing = result.scalar_one_or_none()
     if not filing:
         raise HTTPException(status_code=404, detail="Filing not found")
     
     if not filing.html_file_path:
         raise HTTPException(status_code=400, detail="No HTML file available for parsing")
     
-    # Add parsing task to background
-    background_tasks.add_task(parse_filing_background, filing_id)
+    # Queue parsing on the Celery worker
+    parse_filing_task.delay(filing_id)
     
     return {"message": "Filing parsing started", "filing_id": filing_id}
 
-async def parse_filing_background(filing_id: int):
-    """Background task to parse a filing"""
-    try:
-        with DatabaseManager() as db:
-            filing = db.db.query(Filing).filter(Filing.id == filing_id).first()
-            if not filing:
-                return
-            
-            # Parse the filing
-            parser = FilingParser(file_path=filing.html_file_path)
-            sections = parser.extract_all_sections()
-            
-            # Save sections to database
-            for section_type, content in sections.items():
-                if content and len(content.strip()) > 50:
-                    db.create_section(
-                        filing_id=filing.id,
-                        section_type=section_type,
-                        content=content,
-                        section_title=section_type.replace('_', ' ').title()
-                    )
-            
-            # Mark as processed
-            filing.processed = True
-            db.db.commit()
-            
-            logger.info(f"Successfully parsed filing {filing_id} with {len(sections)} sections")
-            
-    except Exception as e:
-        logger.error(f"Error parsing filing {filing_id}: {str(e)}")
-
 # Company filing endpoints
 @app.get("/companies/{company_id}/filings")
 async def get_company_filings(
     company_id: int,
-    form_type: Optional[str] = Query(None),
-    limit: int = Query(10, le=50),
-    db: Session = Depends(get_db)
+    response: Response,
+    db: DbSession,
+    form_type: Annotated[Optional[str], Query()] = None,
+    limit: Annotated[int, Query(le=50)] = 10
 ):
     """Get filings for a specific company"""
+    response.headers["Cache-Control"] = LIST_CACHE_CONTROL
+    
     # Check if company exists
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = await get_company_data(db, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
     # Get filings
-    query = db.query(Filing).filter(Filing.company_id == company_id)
+    stmt = select(*FILING_LIST_COLUMNS).where(Filing.company_id == company_id)
     
     if form_type:
-        query = query.filter(Filing.form_type == form_type)
+        stmt = stmt.where(Filing.form_type == form_type)
     
-    filings = query.order_by(Filing.filing_date.desc()).limit(limit).all()
+    filings = await fetch_mappings(db, stmt.order_by(Filing.filing_date.desc()).limit(limit))
     
     return {
-        'company': company.to_dict(),
-        'filings': [filing.to_dict() for filing in filings]
+        'company': company,
+        'filings': filings
     }
 
 @app.post("/companies/{company_id}/sync")
 async def sync_company_filings(
     company_id: int,
-    background_tasks: BackgroundTasks,
-    form_type: str = Query("10-K"),
-    download_html: bool = Query(False),
-    db: Session = Depends(get_db)
+    db: DbSession,
+    form_type: Annotated[str, Query()] = "10-K",
+    download_html: Annotated[bool, Query()] = False
 ):
     """Sync latest filings for a company"""
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = await get_company_data(db, company_id)
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
     
-    # Add sync task to background
-    background_tasks.add_task(sync_company_filings_background, company_id, form_type, download_html)
+    # Queue sync on the Celery worker
+    sync_company_filings_task.delay(company_id, form_type, download_html)
     
     return {
-        "message": f"Syncing {form_type} filings for {company.name}",
+        "message": f"Syncing {form_type} filings for {company['name']}",
         "company_id": company_id
     }
 
-async def sync_company_filings_background(company_id: int, form_type: str, download_html: bool):
-    """Background task to sync company filings"""
-    try:
-        with DatabaseManager() as db:
-            company = db.db.query(Company).filter(Company.id == company_id).first()
-            if not company:
-                return
-            
-            # Get latest filings from SEC
-            filings = sec_client.get_company_filings(company.cik, form_type, count=5)
-            
-            for filing_info in filings:
-                # Check if we already have this filing
-                existing = db.get_filing_by_accession(filing_info.accession_number)
-                if existing:
-                    continue
-                
-                # Create new filing
-                filing = db.create_filing(
-                    company_id=company.id,
-                    form_type=filing_info.form_type,
-                    filing_date=filing_info.filing_date,
-                    accession_number=filing_info.accession_number,
-                    document_url=filing_info.document_url
-                )
-                
-                # Download HTML if requested
-                if download_html:
-                    html_path = sec_client.download_filing_html(filing_info)
-                    if html_path:
-                        filing.html_file_path = html_path
-                        db.db.commit()
-                        
-                        # Parse the filing
-                        parser = FilingParser(file_path=html_path)
-                        sections = parser.extract_all_sections()
-                        
-                        # Save sections
-                        for section_type, content in sections.items():
-                            if content and len(content.strip()) > 50:
-                                db.create_section(
-                                    filing_id=filing.id,
-                                    section_type=section_type,
-                                    content=content,
-                                    section_title=section_type.replace('_', ' ').title()
-                                )
-                        
-                        filing.processed = True
-                        db.db.commit()
-            
-            logger.info(f"Successfully synced filings for company {company.name}")
-            
-    except Exception as e:
-        logger.error(f"Error syncing filings for company {company_id}: {str(e)}")
-
 # Analysis endpoints (placeholder for LLM integration)
 @app.get("/analysis")
 async def get_analyses(
-    filing_id: Optional[int] = Query(None),
-    analysis_type: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    db: DbSession,
+    filing_id: Annotated[Optional[int], Query()] = None,
+    analysis_type: Annotated[Optional[str], Query()] = None
 ):
     """Get analysis results"""
-    query = db.query(Analysis)
+    stmt = select(Analysis)
     
     if filing_id:
-        query = query.filter(Analysis.filing_id == filing_id)
+        stmt = stmt.where(Analysis.filing_id == filing_id)
     
     if analysis_type:
-        query = query.filter(Analysis.analysis_type == analysis_type)
+        stmt = stmt.where(Analysis.analysis_type == analysis_type)
     
-    analyses = query.order_by(Analysis.created_at.desc()).all()
+    result = await db.execute(stmt.order_by(Analysis.created_at.desc()))
+    analyses = result.scalars().all()
     return [analysis.to_dict() for analysis in analyses]
 
 @app.post("/analysis/compare")
 async def compare_filings(
-    filing_ids: List[int],
-    comparison_type: str = Query("risk_factors"),
-    db: Session = Depends(get_db)
+    compare_request: CompareRequest,
+    db: DbSession,
+    comparison_type: Annotated[str, Query()] = "risk_factors"
 ):
     """Compare sections across multiple filings"""
-    filings = db.query(Filing).filter(Filing.id.in_(filing_ids)).all()
+    filing_ids = compare_request.filing_ids
+    
+    # Load filings with their company, then only the length and preview of the
+    # compared sections: full section text never leaves the database
+    result = await db.execute(
+        select(Filing)
+        .options(joinedload(Filing.company))
+        .where(Filing.id.in_(filing_ids))
+    )
+    filings = {filing.id: filing for filing in result.scalars().unique().all()}
     
     if len(filings) != len(filing_ids):
         raise HTTPException(status_code=404, detail="One or more filings not found")
     
-    # Get sections for comparison
-    sections = db.query(FilingSection).filter(
-        FilingSection.filing_id.in_(filing_ids),
-        FilingSection.section_type == comparison_type
-    ).all()
+    sections = await fetch_mappings(db, section_previews_stmt(filing_ids, comparison_type))
     
     # Group by filing
     comparison_data = {}
     for section in sections:
-        filing = next(f for f in filings if f.id == section.filing_id)
-        company = db.query(Company).filter(Company.id == filing.company_id).first()
-        
+        filing = filings[section['filing_id']]
         comparison_data[filing.id] = {
             'filing': filing.to_dict(),
-            'company': company.to_dict() if company else None,
+            'company': filing.company.to_dict() if filing.company else None,
             'section': {
-                'content_length': len(section.content) if section.content else 0,
-                'content_preview': section.content[:500] if section.content else None
+                'content_length': section['content_length'],
+                'content_preview': section['content_preview'] or None
             }
         }
     
@@ -379,43 +474,56 @@ async def compare_filings(
 # Search endpoints
 @app.get("/search")
 async def search_filings(
-    query: str = Query(..., min_length=3),
-    form_type: Optional[str] = Query(None),
-    limit: int = Query(20, le=50),
-    db: Session = Depends(get_db)
+    query: Annotated[str, Query(min_length=3)],
+    db: DbSession,
+    form_type: Annotated[Optional[str], Query()] = None,
+    limit: Annotated[int, Query(le=50)] = 20
 ):
-    """Search filings and companies"""
-    # This is a simple search - in production you'd want full-text search
+    """
+    Search filings and companies
+    
+    Company names match by word prefix ('micro' finds "Microsoft Corp",
+    'soft' does not); every word in the query has to match.
+    """
     results = {
         'companies': [],
         'filings': []
     }
     
+    # Company names are matched through the full-text index
+    name_match = company_name_match(query)
+    if name_match is None:
+        return results
+    
     # Search companies
-    companies = db.query(Company).filter(
-        Company.name.ilike(f'%{query}%')
-    ).limit(limit).all()
+    result = await db.execute(
+        select(Company).where(name_match).limit(limit)
+    )
+    companies = result.scalars().all()
     
     results['companies'] = [company.to_dict() for company in companies]
     
     # Search filings (by company name)
-    filing_query = db.query(Filing).join(Company).filter(
-        Company.name.ilike(f'%{query}%')
-    )
+    filing_stmt = select(Filing).join(Company).where(name_match)
     
     if form_type:
-        filing_query = filing_query.filter(Filing.form_type == form_type)
+        filing_stmt = filing_stmt.where(Filing.form_type == form_type)
     
-    filings = filing_query.order_by(Filing.filing_date.desc()).limit(limit).all()
+    result = await db.execute(filing_stmt.order_by(Filing.filing_date.desc()).limit(limit))
+    filings = result.scalars().all()
     results['filings'] = [filing.to_dict() for filing in filings]
     
     return results
 
 if __name__ == "__main__":
     import uvicorn
+    # uvloop + httptools (from uvicorn[standard]); one reloading worker in DEBUG, one per core otherwise
     uvicorn.run(
         "main:app",
         host=settings.API_HOST,
         port=settings.API_PORT,
-        reload=settings.DEBUG
+        reload=settings.DEBUG,
+        workers=1 if settings.DEBUG else settings.API_WORKERS,
+        loop="uvloop",
+        http="httptools"
     )
\ No newline at end of file
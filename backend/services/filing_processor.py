@@ -3,11 +3,12 @@ Simple Filing Processor - downloads, parses, and stores filing sections and char
 """
 
 import requests
-import xml.etree.ElementTree as ET
+from lxml import etree as ET
 from pathlib import Path
 from typing import Dict, List, Optional
 from urllib.parse import urljoin
 import logging
+from sqlalchemy import func
 
 from config import FILINGS_DIR, settings
 from database import DatabaseManager, FilingSection
@@ -151,7 +152,7 @@ class FilingProcessor:
             
             # Download and parse FilingSummary.xml
             response = self.sec_client._make_request(filing_summary_url)
-            root = ET.fromstring(response.text)
+            root = ET.fromstring(response.content)
             
             # Extract R# file mappings
             charts = []
@@ -267,11 +268,13 @@ def test_filing_processor():
                     filings = db.get_company_filings(company.id)
                     if filings:
                         filing = filings[0]
-                        sections = db.db.query(FilingSection).filter(FilingSection.filing_id == filing.id).all()
+                        section_count = db.db.query(func.count(FilingSection.id)).filter(
+                            FilingSection.filing_id == filing.id
+                        ).scalar()
                         charts = db.get_filing_charts(filing.id)
                         
                         print(f"\n📊 Results for {company.name}:")
-                        print(f"  Sections: {len(sections)}")
+                        print(f"  Sections: {section_count}")
                         print(f"  Charts: {len(charts)}")
                         
                         for chart in charts:
@@ -3,9 +3,10 @@ Simple Inline XBRL Handler - extracts financial data from modern SEC filings
 """
 
 import re
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 from typing import Dict, List, Optional
 import logging
+import warnings
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +15,10 @@ class InlineXBRLHandler:
     
     def __init__(self, html_content: str):
         self.html_content = html_content
-        self.soup = BeautifulSoup(html_content, 'html.parser')
+        # iXBRL filings are XHTML with an XML declaration; parsing them as HTML is intentional
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", XMLParsedAsHTMLWarning)
+            self.soup = BeautifulSoup(html_content, 'lxml')
         
     def extract_financial_data(self) -> Dict[str, List[Dict]]:
         """Extract financial data from inline XBRL"""
@@ -5,14 +5,33 @@ This parser extracts XBRL data embedded in HTML files
 """
 
 import re
+from io import BytesIO
 from pathlib import Path
 from typing import Dict, List, Optional, Any
-from bs4 import BeautifulSoup
+from lxml import etree
 import logging
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
 
+# Tags streamed out of the filing. iXBRL filings are XHTML, so they're parsed as
+# XML first; HTML mode (used when a filing isn't well-formed) drops namespaces and
+# lowercases names, so it matches on the prefixed tag names instead
+FACT_TAGS = ('{*}nonFraction', '{*}nonNumeric')
+RESOURCE_TAGS = ('{*}context', '{*}unit')
+HTML_FACT_TAGS = ('ix:nonfraction', 'ix:nonnumeric')
+HTML_RESOURCE_TAGS = ('xbrli:context', 'xbrli:unit')
+
+def _local_name(tag: str) -> str:
+    """Strip the namespace or prefix from a tag name ('{ns}nonFraction' -> 'nonfraction')"""
+    return tag.rsplit('}', 1)[-1].split(':')[-1].lower()
+
+def _release(element):
+    """Free a processed element and the siblings before it so memory stays flat"""
+    element.clear()
+    while element.getprevious() is not None:
+        del element.getparent()[0]
+
 class InlineXBRLParser:
     """Parser for Inline XBRL data embedded in HTML filings"""
     
@@ -20,21 +39,24 @@ class InlineXBRLParser:
         """
         Initialize with either file path or HTML content
         
+        The filing is streamed with lxml's iterparse rather than loaded into a
+        DOM, so large 10-K files are parsed without holding the whole tree.
+        
         Args:
             html_file_path: Path to HTML filing
             html_content: Raw HTML content
         """
         if html_file_path:
-            with open(html_file_path, 'r', encoding='utf-8') as f:
-                self.html_content = f.read()
+            self.html_content = None
             self.file_path = html_file_path
         elif html_content:
+            if isinstance(html_content, str):
+                html_content = html_content.encode('utf-8')
             self.html_content = html_content
             self.file_path = None
         else:
             raise ValueError("Either html_file_path or html_content must be provided")
         
-        self.soup = BeautifulSoup(self.html_content, 'html.parser')
         self.xbrl_facts = []
         self.contexts = {}
         self.units = {}
@@ -45,101 +67,101 @@ class InlineXBRLParser:
     def _parse_inline_xbrl(self):
         """Parse inline XBRL data from HTML"""
         try:
-            # Look for XBRL namespace declarations
-            self._find_xbrl_namespaces()
-            
-            # Find XBRL contexts
-            self._extract_contexts()
-            
-            # Find XBRL units
-            self._extract_units()
-            
-            # Extract XBRL facts
-            self._extract_inline_facts()
+            try:
+                self._stream_inline_xbrl(html=False)
+            except etree.XMLSyntaxError as e:
+                # Not well-formed XHTML, start over with the forgiving HTML parser
+                logger.info(f"Filing is not valid XHTML ({e}), retrying in HTML mode")
+                self.xbrl_facts = []
+                self.contexts = {}
+                self.units = {}
+                self._stream_inline_xbrl(html=True)
             
             logger.info(f"Found {len(self.xbrl_facts)} inline XBRL facts")
             
         except Exception as e:
             logger.error(f"Error parsing inline XBRL: {e}")
     
-    def _find_xbrl_namespaces(self):
-        """Find XBRL namespace declarations in the HTML"""
-        # Look for xmlns declarations in HTML tag or elsewhere
-        html_tag = self.soup.find('html')
-        if html_tag:
-            # Check for XBRL-related namespace declarations
-            for attr_name, attr_value in html_tag.attrs.items():
-                if attr_name.startswith('xmlns:') and 'xbrl' in attr_value.lower():
-                    logger.info(f"Found XBRL namespace: {attr_name}={attr_value}")
-    
-    def _extract_contexts(self):
-        """Extract XBRL contexts from HTML"""
-        # Look for context elements (can be in various formats)
-        context_elements = self.soup.find_all(attrs={'contextref': True})
+    def _stream_inline_xbrl(self, html: bool):
+        """
+        Stream contexts, units and facts out of the filing in a single pass
         
-        # Also look for explicit context definitions
-        for element in self.soup.find_all():
-            if element.name and 'context' in element.name.lower():
-                context_id = element.get('id')
-                if context_id:
-                    self.contexts[context_id] = {
-                        'id': context_id,
-                        'element': element
-                    }
-    
-    def _extract_units(self):
-        """Extract XBRL units from HTML"""
-        # Look for unit elements
-        for element in self.soup.find_all():
-            if element.name and 'unit' in element.name.lower():
-                unit_id = element.get('id')
-                if unit_id:
-                    self.units[unit_id] = {
-                        'id': unit_id,
-                        'element': element
-                    }
-    
-    def _extract_inline_facts(self):
-        """Extract inline XBRL facts from HTML"""
-        # Look for elements with XBRL attributes
-        xbrl_attributes = [
-            'contextref',
-            'unitref',
-            'name',
-            'format',
-            'scale',
-            'decimals'
-        ]
+        Args:
+            html: Parse with the HTML parser instead of the XML one
+        """
+        source = self.file_path or BytesIO(self.html_content)
+        fact_tags = HTML_FACT_TAGS if html else FACT_TAGS
+        resource_tags = HTML_RESOURCE_TAGS if html else RESOURCE_TAGS
+        
+        # Facts can be nested (a nonNumeric text block wrapping nonFraction values),
+        # so only free an element once the outermost fact around it has been read
+        depth = 0
+        root = None
         
-        # Find all elements with XBRL attributes
-        for element in self.soup.find_all():
-            if not element.name:
+        for event, element in etree.iterparse(
+            source, events=('start', 'end'), tag=fact_tags + resource_tags,
+            html=html, huge_tree=True
+        ):
+            if root is None:
+                root = element.getroottree().getroot()
+                self._find_xbrl_namespaces(root)
+            
+            name = _local_name(element.tag)
+            
+            if name in ('context', 'unit'):
+                if event == 'end':
+                    self._extract_resource(name, element)
+                    if depth == 0:
+                        _release(element)
                 continue
             
-            # Check if element has XBRL attributes
-            has_xbrl_attrs = any(attr in element.attrs for attr in xbrl_attributes)
+            if event == 'start':
+                depth += 1
+                continue
             
-            # Also check for elements with XBRL-like names
-            is_xbrl_element = (
-                ':' in element.name or  # Namespaced elements
-                any(keyword in element.name.lower() for keyword in ['us-gaap', 'dei', 'ifrs'])
-            )
+            depth -= 1
+            fact = self._parse_inline_fact(element)
+            if fact:
+                self.xbrl_facts.append(fact)
             
-            if has_xbrl_attrs or is_xbrl_element:
-                fact = self._parse_inline_fact(element)
-                if fact:
-                    self.xbrl_facts.append(fact)
+            if depth == 0:
+                _release(element)
+    
+    def _find_xbrl_namespaces(self, root):
+        """Find XBRL namespace declarations in the HTML"""
+        # XML mode exposes the declarations as nsmap, HTML mode as plain attributes
+        namespaces = {f"xmlns:{prefix}": uri for prefix, uri in root.nsmap.items() if prefix}
+        namespaces.update((name, value) for name, value in root.attrib.items() if name.startswith('xmlns:'))
+        
+        for attr_name, attr_value in namespaces.items():
+            if 'xbrl' in attr_value.lower():
+                logger.info(f"Found XBRL namespace: {attr_name}={attr_value}")
+    
+    def _extract_resource(self, name: str, element):
+        """Record an XBRL context or unit definition"""
+        resource_id = element.get('id')
+        if not resource_id:
+            return
+        
+        if name == 'context':
+            self.contexts[resource_id] = {'id': resource_id}
+        else:
+            self.units[resource_id] = {'id': resource_id}
     
     def _parse_inline_fact(self, element):
         """Parse a single inline XBRL fact"""
         try:
+            # HTML mode lowercases attribute names, XML mode keeps them as written
+            def attr(name):
+                return element.get(name) or element.get(name.lower())
+            
             # Extract basic information
-            concept_name = element.name
-            value = element.get_text(strip=True)
+            concept_name = element.get('name') or _local_name(element.tag)
+            value = ''.join(text.strip() for text in element.itertext())
             
             # Extract XBRL attributes
-            context_ref = element.get('contextref')
-            unit_ref = element.get('unitref')
+            context_ref = attr('contextRef')
+            unit_ref = attr('unitRef')
             scale = element.get('scale')
             decimals = element.get('decimals')
             format_attr = element.get('format')
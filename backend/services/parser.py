@@ -4,9 +4,10 @@ Extracts and standardizes different sections from SEC filing HTML documents
 """
 import re
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
-from bs4 import BeautifulSoup, Tag
+from typing import Dict, List, Optional, Tuple, Union
+from bs4 import BeautifulSoup, Tag, XMLParsedAsHTMLWarning
 import logging
+import warnings
 import pandas as pd
 
 from config import SECTION_MAPPINGS, FINANCIAL_STATEMENTS
@@ -16,12 +17,13 @@ logger = logging.getLogger(__name__)
 class FilingParser:
     """Parser for SEC filing HTML documents"""
     
-    def __init__(self, html_content: str = None, file_path: str = None):
+    def __init__(self, html_content: Union[str, bytes] = None, file_path: str = None):
         """
         Initialize parser with HTML content or file path
         
         Args:
-            html_content: Raw HTML content
+            html_content: Raw HTML content (bytes are handed to BeautifulSoup as-is
+                so it can honour the document's declared encoding)
             file_path: Path to HTML file
         """
         if html_content:
@@ -32,8 +34,23 @@ class FilingParser:
         else:
             raise ValueError("Either html_content or file_path must be provided")
         
-        self.soup = BeautifulSoup(self.html_content, 'html.parser')
+        # html.parser, not lxml: the section walk relies on how it nests the unclosed
+        # <p> tags common in older filings. XHTML (inline XBRL) filings parse fine too
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", XMLParsedAsHTMLWarning)
+            self.soup = BeautifulSoup(self.html_content, 'html.parser')
+        self._html_text = None
         self.form_type = self._detect_form_type()
+    
+    @property
+    def html_text(self) -> str:
+        """Raw document as text, decoded with the encoding BeautifulSoup detected"""
+        if self._html_text is None:
+            content = self.html_content
+            if isinstance(content, bytes):
+                content = content.decode(self.soup.original_encoding or 'utf-8', errors='replace')
+            self._html_text = content
+        return self._html_text
         
     def _detect_form_type(self) -> str:
         """Detect the form type from the HTML content"""
@@ -45,7 +62,7 @@ class FilingParser:
         ]
         
         for pattern in form_patterns:
-            match = re.search(pattern, self.html_content, re.IGNORECASE)
+            match = re.search(pattern, self.html_text, re.IGNORECASE)
             if match:
                 return match.group(1).upper()
         
@@ -286,7 +303,7 @@ class FilingParser:
         }
         
         for metric, pattern in financial_patterns.items():
-            matches = re.findall(pattern, self.html_content, re.IGNORECASE)
+            matches = re.findall(pattern, self.html_text, re.IGNORECASE)
             if matches:
                 highlights[metric] = matches[0]
         
@@ -296,7 +313,7 @@ class FilingParser:
         """Get a summary of the filing with key information"""
         summary = {
             'form_type': self.form_type,
-            'total_length': len(self.html_content),
+            'total_length': len(self.html_text),
             'section_count': len(self.extract_all_sections()),
             'has_financial_data': bool(self._extract_financial_statements()),
             'filing_date': self._extract_filing_date(),
@@ -314,7 +331,7 @@ class FilingParser:
         ]
         
         for pattern in date_patterns:
-            match = re.search(pattern, self.html_content)
+            match = re.search(pattern, self.html_text)
             if match:
                 return match.group(1)
         
@@ -330,7 +347,7 @@ class FilingParser:
         ]
         
         for pattern in name_patterns:
-            match = re.search(pattern, self.html_content, re.IGNORECASE)
+            match = re.search(pattern, self.html_text, re.IGNORECASE)
             if match:
                 return match.group(1).strip()
         
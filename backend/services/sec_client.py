@@ -2,13 +2,21 @@
 SEC API Client for fetching filing data
 """
 import requests
+from requests.adapters import HTTPAdapter
+import httpx
+from lxml import etree
+import asyncio
+import orjson
 import time
+import threading
 import json
 import re
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import urljoin, urlparse
+from collections import OrderedDict
+from functools import lru_cache
 import logging
 from dataclasses import dataclass
 
@@ -16,20 +24,98 @@ from config import settings, FILINGS_DIR
 
 logger = logging.getLogger(__name__)
 
+# Number of parsed companyfacts documents kept in memory per client
+FACTS_MEMORY_CACHE_SIZE = 32
+
+# Number of filing folder listings (index.json) kept in memory per client
+INDEX_MEMORY_CACHE_SIZE = 256
+
+# SEC allows 10 requests per second; cap concurrent async connections to match
+SEC_MAX_CONCURRENT_REQUESTS = 10
+
+# Bytes read per chunk when streaming a download to disk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Leading bytes of a download kept in memory for format sniffing
+DOWNLOAD_HEAD_SIZE = 4 * 1024
+
+# Files larger than one part are downloaded as concurrent Range requests of
+# this size, at most DOWNLOAD_MAX_PARTS in flight at once
+DOWNLOAD_PART_SIZE = 2 * 1024 * 1024
+DOWNLOAD_MAX_PARTS = 8
+
+# Saved filings smaller than this are treated as failed downloads and fetched again
+MIN_CACHED_HTML_BYTES = 1024
+
+# Atom namespace used by the EDGAR company feed
+ATOM_NS = {'a': 'http://www.w3.org/2005/Atom'}
+
+# Document type matcher for the main filing document, compiled once
+_MAIN_DOC_RE = re.compile(r'10-[kq]|8-k|form', re.IGNORECASE)
+
+# XML files in a filing folder that are not the XBRL instance
+_XBRL_NON_INSTANCE_SUFFIXES = ('_cal.xml', '_def.xml', '_lab.xml', '_pre.xml', 'FilingSummary.xml')
+
+# SEC allows 10 requests per second. Refilling at 9/s with room for one token
+# keeps any one-second window at or under 10 (SEC_REQUEST_DELAY can slow it
+# further; 0 turns the extra delay off)
+SEC_REQUESTS_PER_SECOND = min(9.0, 1 / settings.SEC_REQUEST_DELAY) if settings.SEC_REQUEST_DELAY > 0 else 9.0
+
+class TokenBucket:
+    """
+    Token bucket rate limiter usable from threads and event loops alike
+    
+    Tokens refill at `rate` per second up to `capacity`. A caller takes its
+    token under the lock (going into debt if none are left) and waits outside
+    it, so concurrent callers are spaced out in arrival order.
+    """
+    
+    def __init__(self, rate: float, capacity: float = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def reserve(self) -> float:
+        """Take a token and return how many seconds to wait before using it"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+    
+    def acquire(self):
+        """Block until a token is available"""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+    
+    async def acquire_async(self):
+        """Wait for a token without blocking the event loop"""
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+# Shared by every SECClient in the process, sync and async, so separate clients
+# (and tests running side by side) together stay under SEC's limit
+sec_rate_limiter = TokenBucket(rate=SEC_REQUESTS_PER_SECOND)
+
 @dataclass
 class FilingInfo:
     """Data class for filing information"""
     form_type: str
-    filing_date: datetime
+    filing_date: date
     accession_number: str
     document_url: str
     company_name: str
     cik: str
     
     def __post_init__(self):
-        """Convert string dates to datetime objects"""
+        """Convert YYYY-MM-DD string dates to date objects"""
         if isinstance(self.filing_date, str):
-            self.filing_date = datetime.strptime(self.filing_date, "%Y-%m-%d")
+            self.filing_date = date.fromisoformat(self.filing_date)
 
 class SECClient:
     """Client for interacting with SEC EDGAR database"""
@@ -41,34 +127,176 @@ class SECClient:
             'User-Agent': settings.SEC_USER_AGENT,
             'Accept': 'application/json, text/html, */*'
         })
+        # Keep-alive pool sized for the threads that share this client
+        adapter = HTTPAdapter(pool_connections=SEC_MAX_CONCURRENT_REQUESTS,
+                              pool_maxsize=SEC_MAX_CONCURRENT_REQUESTS)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
         
-        # Rate limiting
-        self.last_request_time = 0
-        self.request_delay = settings.SEC_REQUEST_DELAY
+        # Company facts cache: ETag-validated files on disk plus a small in-memory LRU
+        self._cache_dir = FILINGS_DIR / 'facts_cache'
+        self._cache_dir.mkdir(exist_ok=True)
+        self._facts_memory_cache = OrderedDict()
         
-    def _rate_limit(self):
-        """Implement rate limiting to be respectful to SEC servers"""
-        current_time = time.time()
-        time_since_last = current_time - self.last_request_time
+        # Filing document lists never change once filed, so they're cached on disk for good
+        self._documents_cache_dir = FILINGS_DIR / 'documents_cache'
+        self._documents_cache_dir.mkdir(exist_ok=True)
         
-        if time_since_last < self.request_delay:
-            sleep_time = self.request_delay - time_since_last
-            time.sleep(sleep_time)
+        # Folder listings from XBRL probes, so a download right after a check
+        # doesn't fetch index.json again
+        self._index_memory_cache = OrderedDict()
         
-        self.last_request_time = time.time()
+    def _rate_limit(self):
+        """Implement rate limiting to be respectful to SEC servers"""
+        sec_rate_limiter.acquire()
     
-    def _make_request(self, url: str, params: Dict = None) -> requests.Response:
+    def _make_request(self, url: str, params: Dict = None, headers: Dict = None) -> requests.Response:
         """Make a rate-limited request to SEC"""
         self._rate_limit()
         
         try:
-            response = self.session.get(url, params=params)
+            response = self.session.get(url, params=params, headers=headers)
             response.raise_for_status()
             return response
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed for {url}: {str(e)}")
             raise
     
+    def download_to_file(self, url: str, file_path: Path) -> bytes:
+        """
+        Stream a rate-limited download straight to disk
+        
+        The body is written in DOWNLOAD_CHUNK_SIZE pieces, so large documents
+        are never held in memory as a whole. The start of the body is kept so
+        callers can sniff the format without reading the file back.
+        
+        Args:
+            url: Document URL
+            file_path: Where to write the raw bytes
+            
+        Returns:
+            The first DOWNLOAD_HEAD_SIZE bytes of the body
+        """
+        self._rate_limit()
+        
+        try:
+            head = b''
+            with self.session.get(url, stream=True) as response:
+                response.raise_for_status()
+                with open(file_path, 'wb') as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        if len(head) < DOWNLOAD_HEAD_SIZE:
+                            head += chunk[:DOWNLOAD_HEAD_SIZE - len(head)]
+                        f.write(chunk)
+            return head
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request failed for {url}: {str(e)}")
+            raise
+    
+    def download_file_parallel(self, url: str, file_path: Path, size: int) -> None:
+        """
+        Download a large file as concurrent byte ranges
+        
+        Args:
+            url: Document URL
+            file_path: Where to write the raw bytes
+            size: File size in bytes, as listed in the filing's index.json
+        """
+        asyncio.run(self.download_file_parallel_async(url, file_path, size))
+    
+    async def download_file_parallel_async(self, url: str, file_path: Path, size: int,
+                                           max_parts: int = DOWNLOAD_MAX_PARTS,
+                                           part_size: int = DOWNLOAD_PART_SIZE) -> None:
+        """
+        Async version of download_file_parallel
+        
+        The first range is fetched on its own. If the server answers with the
+        whole file (200 instead of 206) that body is streamed to disk and no
+        more requests are made; otherwise the remaining ranges are fetched
+        concurrently and each is written at its offset.
+        
+        Args:
+            url: Document URL
+            file_path: Where to write the raw bytes
+            size: File size in bytes
+            max_parts: Most ranges in flight at once
+            part_size: Bytes per range
+        """
+        ranges = [(start, min(start + part_size, size) - 1) for start in range(0, size, part_size)]
+        semaphore = asyncio.Semaphore(max_parts)
+        
+        async with self._async_client() as client:
+            with open(file_path, 'wb') as f:
+                async def fetch_range(start: int, end: int) -> bool:
+                    """Write one range at its offset; False if the server sent the whole file instead"""
+                    # A slice of a compressed representation can't be decoded on its own
+                    headers = {'Range': f'bytes={start}-{end}', 'Accept-Encoding': 'identity'}
+                    
+                    async with semaphore:
+                        await self._rate_limit_async()
+                        try:
+                            async with client.stream('GET', url, headers=headers) as response:
+                                response.raise_for_status()
+                                
+                                if response.status_code != 206:
+                                    if start != 0:
+                                        raise ValueError(f"Server stopped honoring Range requests partway through {url}")
+                                    # Only the first range runs at this point, so streaming can't interleave
+                                    async for chunk in response.aiter_bytes(DOWNLOAD_CHUNK_SIZE):
+                                        f.write(chunk)
+                                    return False
+                                
+                                content_range = response.headers.get('Content-Range', '')
+                                content = await response.aread()
+                        except httpx.HTTPError as e:
+                            logger.error(f"Request failed for {url}: {str(e)}")
+                            raise
+                    
+                    if content_range != f'bytes {start}-{end}/{size}':
+                        raise ValueError(f"Expected bytes {start}-{end}/{size} of {url}, got Content-Range '{content_range}'")
+                    if len(content) != end - start + 1:
+                        raise ValueError(f"Range {start}-{end} of {url} came back with {len(content)} bytes")
+                    
+                    # No await between seek and write, so concurrent parts can't interleave
+                    f.seek(start)
+                    f.write(content)
+                    return True
+                
+                if not await fetch_range(*ranges[0]):
+                    logger.info(f"Server ignored the Range header for {url}, saved the full response")
+                    return
+                
+                await asyncio.gather(*(fetch_range(start, end) for start, end in ranges[1:]))
+    
+    def _async_client(self) -> httpx.AsyncClient:
+        """Create an async HTTP client whose connection pool caps concurrency at the SEC limit"""
+        return httpx.AsyncClient(
+            headers=dict(self.session.headers),
+            limits=httpx.Limits(
+                max_connections=SEC_MAX_CONCURRENT_REQUESTS,
+                max_keepalive_connections=SEC_MAX_CONCURRENT_REQUESTS
+            ),
+            timeout=30.0,
+            follow_redirects=True
+        )
+    
+    async def _rate_limit_async(self):
+        """Async counterpart of _rate_limit, drawing on the same token bucket"""
+        await sec_rate_limiter.acquire_async()
+    
+    async def _make_request_async(self, client: httpx.AsyncClient, url: str,
+                                  params: Dict = None, headers: Dict = None) -> httpx.Response:
+        """Make a rate-limited async request to SEC"""
+        await self._rate_limit_async()
+        
+        try:
+            response = await client.get(url, params=params, headers=headers)
+            response.raise_for_status()
+            return response
+        except httpx.HTTPError as e:
+            logger.error(f"Request failed for {url}: {str(e)}")
+            raise
+    
     def get_company_filings(self, cik: str, form_type: str = "10-K", 
                            count: int = 10) -> List[FilingInfo]:
         """
@@ -83,7 +311,7 @@ class SECClient:
             List of FilingInfo objects
         """
         # Clean and format CIK
-        cik = str(int(cik)).zfill(10)
+        cik = format_cik(cik)
         
         # Use the company search endpoint
         url = f"{self.base_url}/cgi-bin/browse-edgar"
@@ -100,37 +328,38 @@ class SECClient:
         
         try:
             response = self._make_request(url, params)
-            return self._parse_company_filings(response.text, cik)
+            return self._parse_company_filings(response.content, cik)
         except Exception as e:
             logger.error(f"Failed to get filings for CIK {cik}: {str(e)}")
             return []
     
-    def _parse_company_filings(self, xml_content: str, cik: str) -> List[FilingInfo]:
-        """Parse XML response from SEC company search"""
-        from xml.etree import ElementTree as ET
-        
+    def _parse_company_filings(self, xml_content: bytes, cik: str) -> List[FilingInfo]:
+        """Parse XML response from SEC company search (raw bytes, so lxml honours the declared encoding)"""
         try:
-            root = ET.fromstring(xml_content)
+            root = etree.fromstring(xml_content)
             filings = []
             
             # Find all entry elements (each represents a filing)
-            entries = root.findall('.//{http://www.w3.org/2005/Atom}entry')
+            entries = root.iterfind('a:entry', ATOM_NS)
             
             for entry in entries:
                 try:
                     # Extract filing information
-                    title = entry.find('.//{http://www.w3.org/2005/Atom}title').text
+                    title = entry.findtext('a:title', namespaces=ATOM_NS)
                     
                     # Parse form type from title (e.g., "10-K - Annual report")
                     form_match = re.search(r'(\d+\-[A-Z]+)', title)
                     form_type = form_match.group(1) if form_match else "Unknown"
                     
-                    # Get filing date
-                    updated = entry.find('.//{http://www.w3.org/2005/Atom}updated').text
-                    filing_date = datetime.fromisoformat(updated.replace('Z', '+00:00')).date()
+                    # Get filing date (the date part of the ISO timestamp, in its own offset)
+                    updated = entry.findtext('a:updated', namespaces=ATOM_NS)
+                    filing_date = date.fromisoformat(updated[:10])
                     
                     # Get document link
-                    link = entry.find('.//{http://www.w3.org/2005/Atom}link[@type="text/html"]')
+                    link = next(
+                        (l for l in entry.iterfind('a:link', ATOM_NS) if l.get('type') == 'text/html'),
+                        None
+                    )
                     if link is not None:
                         document_url = link.get('href')
                         
@@ -139,11 +368,11 @@ class SECClient:
                         accession_number = accession_match.group(1) if accession_match else None
                         
                         # Get company name from content
-                        content = entry.find('.//{http://www.w3.org/2005/Atom}content')
+                        content = entry.findtext('a:content', namespaces=ATOM_NS)
                         company_name = "Unknown"
-                        if content is not None and content.text:
+                        if content:
                             # Extract company name from content
-                            lines = content.text.split('\n')
+                            lines = content.split('\n')
                             for line in lines:
                                 if 'Company Name:' in line:
                                     company_name = line.split('Company Name:')[1].strip()
@@ -166,7 +395,7 @@ class SECClient:
             logger.info(f"Successfully parsed {len(filings)} filings")
             return filings
             
-        except ET.ParseError as e:
+        except etree.XMLSyntaxError as e:
             logger.error(f"Failed to parse XML response: {str(e)}")
             return []
     
@@ -180,41 +409,72 @@ class SECClient:
         Returns:
             List of document dictionaries with 'type', 'description', and 'url'
         """
+        cached = self._load_cached_documents(filing_info)
+        if cached is not None:
+            return cached
+        
         try:
             response = self._make_request(filing_info.document_url)
-            return self._parse_filing_documents(response.text, filing_info.document_url)
+            documents = self._parse_filing_documents(response.text, filing_info.document_url)
+            self._store_cached_documents(filing_info, documents)
+            return documents
         except Exception as e:
             logger.error(f"Failed to get documents for filing {filing_info.accession_number}: {str(e)}")
             return []
     
+    def _documents_cache_path(self, filing_info: FilingInfo) -> Optional[Path]:
+        """Cache file for a filing's document list (None if the accession number is unknown)"""
+        if not filing_info.accession_number:
+            return None
+        return self._documents_cache_dir / f"{filing_info.accession_number}.json"
+    
+    def _load_cached_documents(self, filing_info: FilingInfo) -> Optional[List[Dict[str, str]]]:
+        """Return a filing's cached document list, if present"""
+        cache_path = self._documents_cache_path(filing_info)
+        if cache_path is None or not cache_path.exists():
+            return None
+        
+        try:
+            return orjson.loads(cache_path.read_bytes())
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable documents cache for {filing_info.accession_number}: {e}")
+            return None
+    
+    def _store_cached_documents(self, filing_info: FilingInfo, documents: List[Dict[str, str]]):
+        """Write a filing's document list to disk (empty lists aren't cached)"""
+        cache_path = self._documents_cache_path(filing_info)
+        if cache_path is None or not documents:
+            return
+        
+        try:
+            cache_path.write_bytes(orjson.dumps(documents))
+        except OSError as e:
+            logger.warning(f"Failed to write documents cache for {filing_info.accession_number}: {e}")
+    
     def _parse_filing_documents(self, html_content: str, base_url: str) -> List[Dict[str, str]]:
         """Parse filing page to extract document links"""
-        from bs4 import BeautifulSoup
+        from lxml import html
         
-        soup = BeautifulSoup(html_content, 'html.parser')
+        tree = html.fromstring(html_content)
         documents = []
         
         # Find the documents table
-        table = soup.find('table', {'class': 'tableFile'})
-        if not table:
+        tables = tree.xpath('//table[contains(concat(" ", normalize-space(@class), " "), " tableFile ")]')
+        if not tables:
             logger.warning("No documents table found in filing page")
             return documents
         
         # Parse each document row
-        for row in table.find_all('tr')[1:]:  # Skip header row
-            cells = row.find_all('td')
+        for row in tables[0].xpath('./tr[position() > 1] | ./tbody/tr[position() > 1]'):  # Skip header row
+            cells = row.xpath('./td')
             if len(cells) >= 4:
                 # Extract document info
-                doc_link = cells[2].find('a')
-                if doc_link:
-                    doc_url = urljoin(base_url, doc_link.get('href'))
-                    doc_type = cells[3].text.strip()
-                    description = cells[1].text.strip()
-                    
+                hrefs = cells[2].xpath('.//a/@href')
+                if hrefs:
                     documents.append({
-                        'type': doc_type,
-                        'description': description,
-                        'url': doc_url
+                        'type': cells[3].text_content().strip(),
+                        'description': cells[1].text_content().strip(),
+                        'url': urljoin(base_url, hrefs[0])
                     })
         
         return documents
@@ -230,21 +490,15 @@ class SECClient:
         Returns:
             Path to saved file or None if failed
         """
+        cached_path = self._existing_filing_html(filing_info, save_path)
+        if cached_path:
+            return cached_path
+        
         try:
             # Get all documents for this filing
             documents = self.get_filing_documents(filing_info)
             
-            # Find the main filing document (usually the first one or one with specific type)
-            main_doc = None
-            for doc in documents:
-                if any(keyword in doc['type'].lower() for keyword in ['10-k', '10-q', '8-k', 'form']):
-                    main_doc = doc
-                    break
-            
-            if not main_doc:
-                # If no specific form found, use the first document
-                main_doc = documents[0] if documents else None
-            
+            main_doc = self._select_main_document(documents)
             if not main_doc:
                 logger.error(f"No suitable document found for filing {filing_info.accession_number}")
                 return None
@@ -252,42 +506,172 @@ class SECClient:
             # Download the document
             response = self._make_request(main_doc['url'])
             
-            # Determine save path
-            if save_path is None:
-                filename = f"{filing_info.cik}_{filing_info.form_type}_{filing_info.accession_number}.html"
-                save_path = FILINGS_DIR / filename
+            return self._save_filing_html(filing_info, response.text, save_path)
+            
+        except Exception as e:
+            logger.error(f"Failed to download filing {filing_info.accession_number}: {str(e)}")
+            return None
+    
+    async def download_filing_html_async(self, filing_info: FilingInfo, client: httpx.AsyncClient,
+                                         save_path: Path = None) -> Optional[str]:
+        """
+        Async version of download_filing_html sharing a caller-owned client
+        
+        Args:
+            filing_info: FilingInfo object
+            client: Client from _async_client(), shared across concurrent downloads
+            save_path: Optional path to save the file
+            
+        Returns:
+            Path to saved file or None if failed
+        """
+        cached_path = self._existing_filing_html(filing_info, save_path)
+        if cached_path:
+            return cached_path
+        
+        try:
+            documents = self._load_cached_documents(filing_info)
+            if documents is None:
+                response = await self._make_request_async(client, filing_info.document_url)
+                documents = self._parse_filing_documents(response.text, filing_info.document_url)
+                self._store_cached_documents(filing_info, documents)
+            
+            main_doc = self._select_main_document(documents)
+            if not main_doc:
+                logger.error(f"No suitable document found for filing {filing_info.accession_number}")
+                return None
             
-            # Save the file
-            with open(save_path, 'w', encoding='utf-8') as f:
-                f.write(response.text)
+            response = await self._make_request_async(client, main_doc['url'])
             
-            logger.info(f"Downloaded filing to {save_path}")
-            return str(save_path)
+            return self._save_filing_html(filing_info, response.text, save_path)
             
         except Exception as e:
             logger.error(f"Failed to download filing {filing_info.accession_number}: {str(e)}")
             return None
     
+    async def download_filings_html_async(self, filings: List[FilingInfo]) -> List[Optional[str]]:
+        """
+        Download the main HTML document for several filings concurrently
+        
+        Args:
+            filings: FilingInfo objects to download
+            
+        Returns:
+            Saved file path (or None if failed) for each filing, in input order
+        """
+        async with self._async_client() as client:
+            return await asyncio.gather(
+                *(self.download_filing_html_async(filing_info, client) for filing_info in filings)
+            )
+    
+    def _select_main_document(self, documents: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """Find the main filing document (one with a form type, else the first one)"""
+        return next(
+            (doc for doc in documents if _MAIN_DOC_RE.search(doc['type'])),
+            documents[0] if documents else None
+        )
+    
+    def _filing_html_path(self, filing_info: FilingInfo, save_path: Path = None) -> Path:
+        """Where a filing's main document is saved (deterministic per accession number)"""
+        if save_path is None:
+            filename = f"{filing_info.cik}_{filing_info.form_type}_{filing_info.accession_number}.html"
+            save_path = FILINGS_DIR / filename
+        return Path(save_path)
+    
+    def _existing_filing_html(self, filing_info: FilingInfo, save_path: Path = None) -> Optional[str]:
+        """Path of an earlier download of this filing, if one is already on disk"""
+        path = self._filing_html_path(filing_info, save_path)
+        if path.exists() and path.stat().st_size > MIN_CACHED_HTML_BYTES:
+            logger.info(f"Filing {filing_info.accession_number} already downloaded to {path}")
+            return str(path)
+        return None
+    
+    def _save_filing_html(self, filing_info: FilingInfo, html: str, save_path: Path = None) -> str:
+        """Write a downloaded filing document to disk and return its path"""
+        save_path = self._filing_html_path(filing_info, save_path)
+        
+        with open(save_path, 'w', encoding='utf-8') as f:
+            f.write(html)
+        
+        logger.info(f"Downloaded filing to {save_path}")
+        return str(save_path)
+    
     def get_company_facts(self, cik: str) -> Optional[Dict]:
         """
         Get company facts from SEC API (newer structured data)
         
+        Responses are cached on disk with their ETag and revalidated with a
+        conditional GET, so an unchanged document is never downloaded twice.
+        
         Args:
             cik: Company CIK
             
         Returns:
             Company facts dictionary or None if failed
         """
-        cik = str(int(cik)).zfill(10)
+        cik = format_cik(cik)
         url = f"https://data.sec.gov/api/xbrl/companyfacts/CIK{cik}.json"
         
+        cached = self._load_cached_facts(cik)
+        headers = {'If-None-Match': cached[0]} if cached and cached[0] else None
+        
         try:
-            response = self._make_request(url)
-            return response.json()
+            response = self._make_request(url, headers=headers)
+            if response.status_code == 304 and cached:
+                logger.info(f"Company facts for CIK {cik} not modified, using cache")
+                return cached[1]
+            
+            facts = orjson.loads(response.content)
+            self._store_cached_facts(cik, response.headers.get('ETag'), response.content, facts)
+            return facts
         except Exception as e:
             logger.error(f"Failed to get company facts for CIK {cik}: {str(e)}")
             return None
     
+    def _load_cached_facts(self, cik: str) -> Optional[Tuple[Optional[str], Dict]]:
+        """Return (etag, facts) from the memory or disk cache, if present"""
+        if cik in self._facts_memory_cache:
+            self._facts_memory_cache.move_to_end(cik)
+            return self._facts_memory_cache[cik]
+        
+        json_path = self._cache_dir / f"{cik}.json"
+        etag_path = self._cache_dir / f"{cik}.etag"
+        if not json_path.exists():
+            return None
+        
+        try:
+            with open(json_path, 'rb') as f:
+                facts = orjson.loads(f.read())
+            etag = etag_path.read_text().strip() if etag_path.exists() else None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable facts cache for CIK {cik}: {e}")
+            return None
+        
+        self._remember_facts(cik, etag, facts)
+        return etag, facts
+    
+    def _store_cached_facts(self, cik: str, etag: Optional[str], raw: bytes, facts: Dict):
+        """Write the raw facts JSON and its ETag to disk and the memory cache"""
+        try:
+            with open(self._cache_dir / f"{cik}.json", 'wb') as f:
+                f.write(raw)
+            etag_path = self._cache_dir / f"{cik}.etag"
+            if etag:
+                etag_path.write_text(etag)
+            elif etag_path.exists():
+                etag_path.unlink()
+        except OSError as e:
+            logger.warning(f"Failed to write facts cache for CIK {cik}: {e}")
+        
+        self._remember_facts(cik, etag, facts)
+    
+    def _remember_facts(self, cik: str, etag: Optional[str], facts: Dict):
+        """Insert into the in-memory LRU, evicting the oldest entry when full"""
+        self._facts_memory_cache[cik] = (etag, facts)
+        self._facts_memory_cache.move_to_end(cik)
+        while len(self._facts_memory_cache) > FACTS_MEMORY_CACHE_SIZE:
+            self._facts_memory_cache.popitem(last=False)
+    
     def search_filings(self, query: str, start_date: datetime = None, 
                       end_date: datetime = None) -> List[FilingInfo]:
         """
@@ -340,6 +724,55 @@ class SECClient:
         cutoff_date = datetime.now().date() - timedelta(days=days)
         return filing_info.filing_date >= cutoff_date
 
+    def _get_filing_index_json(self, filing_info: FilingInfo) -> List[Dict[str, str]]:
+        """
+        Get the machine-readable file listing for a filing folder
+        
+        Args:
+            filing_info: FilingInfo object
+            
+        Returns:
+            List of item dictionaries with 'name', 'type' and 'size'
+        """
+        items = self._cached_index_items(filing_info)
+        if items is None:
+            response = self._make_request(self._filing_folder_url(filing_info) + "index.json")
+            items = self._remember_index_items(filing_info, response.content)
+        return items
+    
+    def _cached_index_items(self, filing_info: FilingInfo) -> Optional[List[Dict[str, str]]]:
+        """Return a filing's folder listing if it was fetched recently"""
+        items = self._index_memory_cache.get(filing_info.accession_number)
+        if items is not None:
+            self._index_memory_cache.move_to_end(filing_info.accession_number)
+        return items
+    
+    def _remember_index_items(self, filing_info: FilingInfo, content: bytes) -> List[Dict[str, str]]:
+        """Parse an index.json body and keep its items in the in-memory LRU"""
+        items = orjson.loads(content).get('directory', {}).get('item', [])
+        self._index_memory_cache[filing_info.accession_number] = items
+        self._index_memory_cache.move_to_end(filing_info.accession_number)
+        while len(self._index_memory_cache) > INDEX_MEMORY_CACHE_SIZE:
+            self._index_memory_cache.popitem(last=False)
+        return items
+    
+    def _filing_folder_url(self, filing_info: FilingInfo) -> str:
+        """Build the EDGAR archive folder URL from CIK and accession number"""
+        accession = filing_info.accession_number.replace('-', '')
+        return f"{settings.SEC_BASE_URL}/{int(filing_info.cik)}/{accession}/"
+    
+    def _find_xbrl_instance(self, items: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """Pick the XBRL instance from an index.json listing, preferring the inline-extracted one"""
+        inline_instance = next((item for item in items if item['name'].endswith('_htm.xml')), None)
+        if inline_instance:
+            return inline_instance
+        
+        return next(
+            (item for item in items
+             if item['name'].endswith('.xml') and not item['name'].endswith(_XBRL_NON_INSTANCE_SUFFIXES)),
+            None
+        )
+    
     def download_xbrl_for_filing(self, filing_info: FilingInfo, save_dir: Path = None) -> Optional[str]:
         """
         Simple method to download XBRL file for a filing
@@ -355,33 +788,25 @@ class SECClient:
             save_dir = FILINGS_DIR
         
         try:
-            # Get all documents for this filing
-            documents = self.get_filing_documents(filing_info)
+            # Look for XBRL instance document in the filing folder listing
+            items = self._get_filing_index_json(filing_info)
+            xbrl_item = self._find_xbrl_instance(items)
             
-            # Look for XBRL instance document
-            xbrl_doc = None
-            for doc in documents:
-                # Look for common XBRL file indicators
-                if (doc['type'].lower() == 'ex-101.ins' or 
-                    'instance' in doc['description'].lower() or
-                    doc['url'].endswith('.xml')):
-                    xbrl_doc = doc
-                    break
-            
-            if not xbrl_doc:
+            if not xbrl_item:
                 logger.warning(f"No XBRL document found for filing {filing_info.accession_number}")
                 return None
             
-            # Download the XBRL file
-            response = self._make_request(xbrl_doc['url'])
-            
             # Create filename
             filename = f"{filing_info.cik}_{filing_info.accession_number}_instance.xml"
             file_path = save_dir / filename
             
-            # Save the file
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(response.text)
+            # Download the XBRL file straight to disk, in parallel ranges when it's large
+            url = self._filing_folder_url(filing_info) + xbrl_item['name']
+            size = int(xbrl_item.get('size') or 0)
+            if size > DOWNLOAD_PART_SIZE:
+                self.download_file_parallel(url, file_path, size)
+            else:
+                self.download_to_file(url, file_path)
             
             logger.info(f"Downloaded XBRL file to {file_path}")
             return str(file_path)
@@ -401,28 +826,67 @@ class SECClient:
             True if XBRL data is available
         """
         try:
-            documents = self.get_filing_documents(filing_info)
-            
-            # Look for XBRL indicators
-            for doc in documents:
-                if (doc['type'].lower() == 'ex-101.ins' or 
-                    'instance' in doc['description'].lower() or
-                    'xbrl' in doc['description'].lower()):
-                    return True
+            items = self._get_filing_index_json(filing_info)
+            return self._find_xbrl_instance(items) is not None
             
+        except Exception as e:
+            logger.error(f"Failed to check XBRL availability: {e}")
             return False
+    
+    async def check_filing_has_xbrl_async(self, filing_info: FilingInfo, client: httpx.AsyncClient) -> bool:
+        """
+        Async version of check_filing_has_xbrl sharing a caller-owned client
+        
+        Args:
+            filing_info: FilingInfo object
+            client: Client from _async_client(), shared across concurrent checks
+            
+        Returns:
+            True if XBRL data is available
+        """
+        try:
+            items = self._cached_index_items(filing_info)
+            if items is None:
+                url = self._filing_folder_url(filing_info) + "index.json"
+                response = await self._make_request_async(client, url)
+                items = self._remember_index_items(filing_info, response.content)
+            return self._find_xbrl_instance(items) is not None
             
         except Exception as e:
             logger.error(f"Failed to check XBRL availability: {e}")
             return False
     
+    async def check_filings_have_xbrl_async(self, filings: List[FilingInfo]) -> List[bool]:
+        """
+        Check several filings for XBRL data concurrently
+        
+        Args:
+            filings: FilingInfo objects to check
+            
+        Returns:
+            Whether XBRL data is available for each filing, in input order
+        """
+        async with self._async_client() as client:
+            return await asyncio.gather(
+                *(self.check_filing_has_xbrl_async(filing_info, client) for filing_info in filings)
+            )
+    
 
-
+@lru_cache(maxsize=1)
+def get_sec_client() -> SECClient:
+    """Shared SECClient, so callers in one process reuse its connection pool and caches"""
+    return SECClient()
 
 # Utility functions
-def format_cik(cik: str) -> str:
-    """Format CIK to standard 10-digit format"""
-    return str(int(cik)).zfill(10)
+def format_cik(cik) -> str:
+    """Format CIK (str or int) to standard 10-digit format"""
+    cik_str = cik if isinstance(cik, str) else str(cik)
+    
+    # Already-numeric ASCII strings only need padding; anything else, including
+    # non-ASCII digits that isdigit() accepts, is normalized via int
+    if len(cik_str) <= 10 and cik_str.isascii() and cik_str.isdigit():
+        return cik_str.zfill(10)
+    return str(int(cik_str)).zfill(10)
 
 def parse_accession_number(accession: str) -> str:
     """Parse and format accession number"""
@@ -3,29 +3,94 @@ Simple XBRL parser for beginners
 This is a simplified version that focuses on getting basic financial data
 """
 
-import xml.etree.ElementTree as ET
-from typing import Dict, List, Optional
+from lxml import etree as ET
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 import re
 import logging
+from operator import attrgetter, itemgetter
 from pathlib import Path
+import pandas as pd
 
 logger = logging.getLogger(__name__)
 
+# XBRL instance namespace, bound once so lookups don't re-resolve the full URI
+XBRLI_NS = 'http://www.xbrl.org/2003/instance'
+NS = {'xbrli': XBRLI_NS}
+XBRLI_PREFIX = '{' + XBRLI_NS + '}'
+
+# Non-xbrli top-level elements that aren't facts
+SKIP_ELEMENTS = ('context', 'unit', 'schemaref', 'linkbaseref')
+
+# Key concepts we're looking for, matched as substrings of the concept name
+KEY_CONCEPTS = {
+    'revenue': ['Revenues', 'Revenue', 'SalesRevenueNet'],
+    'net_income': ['NetIncome', 'NetIncomeLoss'],
+    'total_assets': ['Assets'],
+    'cash': ['Cash', 'CashAndCashEquivalents'],
+    'stockholders_equity': ['StockholdersEquity']
+}
+
+# One compiled alternation per metric, built once instead of on every lookup.
+# Matching stays substring-based ('Assets' also finds 'AssetsCurrent'), so an
+# exact-name set can't replace it without changing which facts are picked
+KEY_CONCEPT_PATTERNS = {
+    metric_name: re.compile('|'.join(re.escape(variation) for variation in concept_variations))
+    for metric_name, concept_variations in KEY_CONCEPTS.items()
+}
+
+class Fact:
+    """A single XBRL fact (slotted to keep large filings small in memory)"""
+    
+    __slots__ = (
+        'concept_name', 'value', 'context_ref', 'unit_ref', 'unit', 'is_monetary',
+        'period_type', 'period_start', 'period_end', 'period_date'
+    )
+    
+    def __init__(self, concept_name, value, context_ref, unit_ref, unit, is_monetary,
+                 period_type, period_start, period_end, period_date):
+        self.concept_name = concept_name
+        self.value = value
+        self.context_ref = context_ref
+        self.unit_ref = unit_ref
+        self.unit = unit
+        self.is_monetary = is_monetary
+        self.period_type = period_type
+        self.period_start = period_start
+        self.period_end = period_end
+        self.period_date = period_date
+    
+    def __repr__(self):
+        return f"<Fact(concept_name='{self.concept_name}', value='{self.value}', context_ref='{self.context_ref}')>"
+    
+    def as_dict(self) -> Dict:
+        """Convert fact to dictionary"""
+        return {field: getattr(self, field) for field in self.__slots__}
+
+# Column order for the facts DataFrame
+FACT_COLUMNS = list(Fact.__slots__)
+_fact_row = attrgetter(*FACT_COLUMNS)
+
 class SimpleXBRLParser:
     """Simple XBRL parser that extracts basic financial facts"""
     
-    def __init__(self, xbrl_file_path: str):
+    def __init__(self, xbrl_file_path: str, load_facts: bool = True):
         """
         Initialize with path to XBRL file
         
         Args:
             xbrl_file_path: Path to the XBRL instance document
+            load_facts: Parse all facts up front. Pass False and use iter_facts()
+                to walk a large filing without keeping its facts in memory
         """
         self.xbrl_file_path = xbrl_file_path
         self.facts = []
         self.contexts = {}
         self.units = {}
+        self._dataframe = None
+        
+        if not load_facts:
+            return
         
         # Try to parse the file
         try:
@@ -37,92 +102,111 @@ class SimpleXBRLParser:
     
     def _parse_file(self):
         """Parse the XBRL file and extract facts"""
-        # Parse the XML file
-        tree = ET.parse(self.xbrl_file_path)
-        root = tree.getroot()
-        
-        # First, get all the contexts (time periods)
-        self._extract_contexts(root)
+        # Deferred facts come out of the stream late; sorting by position puts
+        # them back in document order (the list is already almost sorted)
+        self.facts = [fact for _, fact in sorted(self.iter_positioned_facts(), key=itemgetter(0))]
+    
+    def iter_facts(self) -> Iterator[Fact]:
+        """
+        Stream facts out of the XBRL file one at a time
         
-        # Then get all the units (currencies, etc.)
-        self._extract_units(root)
+        Facts are not guaranteed to come out in document order; see
+        iter_positioned_facts() when order matters.
         
-        # Finally, extract all the facts
-        self._extract_facts(root)
+        Yields:
+            Fact objects
+        """
+        for _, fact in self.iter_positioned_facts():
+            yield fact
     
-    def _extract_contexts(self, root):
-        """Extract context information (time periods)"""
-        # Find all context elements
-        contexts = root.findall('.//{http://www.xbrl.org/2003/instance}context')
+    def iter_positioned_facts(self) -> Iterator[Tuple[int, Fact]]:
+        """
+        Stream facts out of the XBRL file together with their document position
         
-        for context in contexts:
-            context_id = context.get('id')
-            
-            # Get the period information
-            period_info = {}
-            period = context.find('.//{http://www.xbrl.org/2003/instance}period')
-            
-            if period is not None:
-                # Check if it's an instant or duration
-                instant = period.find('.//{http://www.xbrl.org/2003/instance}instant')
-                if instant is not None:
-                    period_info = {
-                        'type': 'instant',
-                        'date': instant.text
-                    }
-                else:
-                    start_date = period.find('.//{http://www.xbrl.org/2003/instance}startDate')
-                    end_date = period.find('.//{http://www.xbrl.org/2003/instance}endDate')
-                    if start_date is not None and end_date is not None:
-                        period_info = {
-                            'type': 'duration',
-                            'start': start_date.text,
-                            'end': end_date.text
-                        }
-            
-            self.contexts[context_id] = period_info
-    
-    def _extract_units(self, root):
-        """Extract unit information (currencies, etc.)"""
-        units = root.findall('.//{http://www.xbrl.org/2003/instance}unit')
+        The file is read with iterparse and each top-level element is freed
+        once it has been handled, so memory stays flat however large the
+        instance document is. Contexts and units are recorded as they are
+        reached. A fact that refers to a context or unit defined further down
+        the file (many filer tools write contexts last) is held back and
+        yielded at the end, so the output is not in document order. Compare
+        positions to find which of two facts came first.
         
-        for unit in units:
-            unit_id = unit.get('id')
-            
-            # Get the measure (usually currency like USD)
-            measure = unit.find('.//{http://www.xbrl.org/2003/instance}measure')
-            if measure is not None:
-                self.units[unit_id] = measure.text
-    
-    def _extract_facts(self, root):
-        """Extract all the financial facts"""
-        # Look for all elements that are not structural elements
-        skip_elements = ['context', 'unit', 'schemaRef', 'linkbaseRef']
-        
-        for element in root:
-            # Skip namespace declarations and structural elements
-            if element.tag.startswith('{http://www.xbrl.org/2003/instance}'):
+        Yields:
+            (position, Fact) tuples, position being the fact's index in
+            document order
+        """
+        self.contexts = {}
+        self.units = {}
+        pending = []
+        position = 0
+        depth = 0
+        
+        for event, element in ET.iterparse(self.xbrl_file_path, events=('start', 'end'), huge_tree=True):
+            if event == 'start':
+                depth += 1
                 continue
             
-            # Get the concept name (remove namespace)
-            concept_name = element.tag.split('}')[-1]
-            
-            # Skip structural elements
-            if concept_name.lower() in skip_elements:
+            depth -= 1
+            # Only direct children of the xbrli:xbrl root are contexts, units or facts
+            if depth != 1:
                 continue
             
-            # This is a fact - extract its information
-            fact = self._extract_fact_info(element, concept_name)
-            if fact:
-                self.facts.append(fact)
-    
-    def _extract_fact_info(self, element, concept_name):
-        """Extract information from a single fact element"""
-        # Get the basic information
-        value = element.text
-        context_ref = element.get('contextRef')
-        unit_ref = element.get('unitRef')
+            tag = element.tag
+            if tag == XBRLI_PREFIX + 'context':
+                self.contexts[element.get('id')] = self._context_period(element)
+            elif tag == XBRLI_PREFIX + 'unit':
+                measure = element.find('.//xbrli:measure', NS)
+                if measure is not None:
+                    self.units[element.get('id')] = measure.text
+            elif not tag.startswith(XBRLI_PREFIX):
+                # Get the concept name (remove namespace)
+                concept_name = tag.rsplit('}', 1)[-1]
+                
+                # Skip structural elements
+                if concept_name.lower() not in SKIP_ELEMENTS:
+                    context_ref = element.get('contextRef')
+                    unit_ref = element.get('unitRef')
+                    if context_ref not in self.contexts or (unit_ref and unit_ref not in self.units):
+                        pending.append((position, (concept_name, element.text, context_ref, unit_ref)))
+                    else:
+                        yield position, self._extract_fact_info(concept_name, element.text, context_ref, unit_ref)
+                    position += 1
+            
+            # Free this element and everything before it
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
         
+        for fact_position, fact_fields in pending:
+            yield fact_position, self._extract_fact_info(*fact_fields)
+    
+    def _context_period(self, context) -> Dict:
+        """Extract the period (instant or duration) from an xbrli:context element"""
+        period = context.find('xbrli:period', NS)
+        if period is None:
+            return {}
+        
+        # Check if it's an instant or duration
+        instant = period.find('xbrli:instant', NS)
+        if instant is not None:
+            return {
+                'type': 'instant',
+                'date': instant.text
+            }
+        
+        start_date = period.find('xbrli:startDate', NS)
+        end_date = period.find('xbrli:endDate', NS)
+        if start_date is not None and end_date is not None:
+            return {
+                'type': 'duration',
+                'start': start_date.text,
+                'end': end_date.text
+            }
+        
+        return {}
+    
+    def _extract_fact_info(self, concept_name, value, context_ref, unit_ref):
+        """Build a Fact from a fact element's name, text and references"""
         # Get context information
         context_info = self.contexts.get(context_ref, {})
         
@@ -132,75 +216,78 @@ class SimpleXBRLParser:
         # Determine if this is a monetary value
         is_monetary = 'USD' in unit_info or 'usd' in unit_info.lower() if unit_info else False
         
-        # Create the fact dictionary
-        fact = {
-            'concept_name': concept_name,
-            'value': value,
-            'context_ref': context_ref,
-            'unit_ref': unit_ref,
-            'unit': unit_info,
-            'is_monetary': is_monetary,
-            'period_type': context_info.get('type', ''),
-            'period_start': context_info.get('start', ''),
-            'period_end': context_info.get('end', ''),
-            'period_date': context_info.get('date', '')
-        }
+        return Fact(
+            concept_name=concept_name,
+            value=value,
+            context_ref=context_ref,
+            unit_ref=unit_ref,
+            unit=unit_info,
+            is_monetary=is_monetary,
+            period_type=context_info.get('type', ''),
+            period_start=context_info.get('start', ''),
+            period_end=context_info.get('end', ''),
+            period_date=context_info.get('date', '')
+        )
+    
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Get all facts as a DataFrame with a vectorized numeric value column
         
-        return fact
+        Returns:
+            DataFrame with one row per fact plus a 'value_numeric' column
+            (NaN where the value is not a number)
+        """
+        if self._dataframe is None:
+            df = pd.DataFrame.from_records([_fact_row(fact) for fact in self.facts], columns=FACT_COLUMNS)
+            df['value_numeric'] = pd.to_numeric(df['value'], errors='coerce')
+            self._dataframe = df
+        return self._dataframe
     
     def get_key_metrics(self):
         """Get key financial metrics from the facts"""
         metrics = {}
         
-        # Define key concepts we're looking for
-        key_concepts = {
-            'revenue': ['Revenues', 'Revenue', 'SalesRevenueNet'],
-            'net_income': ['NetIncome', 'NetIncomeLoss'],
-            'total_assets': ['Assets'],
-            'cash': ['Cash', 'CashAndCashEquivalents'],
-            'stockholders_equity': ['StockholdersEquity']
-        }
+        df = self.to_dataframe()
+        if df.empty:
+            return metrics
         
-        # Find facts that match these concepts
-        for metric_name, concept_variations in key_concepts.items():
-            for fact in self.facts:
-                concept_name = fact['concept_name']
-                
-                # Check if this fact matches any of our key concepts
-                for concept_variation in concept_variations:
-                    if concept_variation in concept_name:
-                        # Convert value to float if it's monetary
-                        try:
-                            if fact['is_monetary'] and fact['value']:
-                                value = float(fact['value'])
-                            else:
-                                value = fact['value']
-                            
-                            metrics[metric_name] = {
-                                'value': value,
-                                'concept': concept_name,
-                                'unit': fact['unit'],
-                                'period_type': fact['period_type'],
-                                'period_start': fact['period_start'],
-                                'period_end': fact['period_end'],
-                                'period_date': fact['period_date']
-                            }
-                            break
-                        except (ValueError, TypeError):
-                            continue
-                
-                if metric_name in metrics:
-                    break
+        # Monetary facts with a value that isn't numeric can't be used
+        has_value = df['value'].notna() & (df['value'] != '')
+        unusable = df['is_monetary'] & has_value & df['value_numeric'].isna()
+        
+        # Find the first fact (in document order) that matches each concept
+        for metric_name, pattern in KEY_CONCEPT_PATTERNS.items():
+            matches = df[df['concept_name'].str.contains(pattern) & ~unusable]
+            if matches.empty:
+                continue
+            
+            fact = matches.iloc[0]
+            
+            # Use the converted value if it's monetary
+            if fact['is_monetary'] and has_value[fact.name]:
+                value = float(fact['value_numeric'])
+            else:
+                value = fact['value']
+            
+            metrics[metric_name] = {
+                'value': value,
+                'concept': fact['concept_name'],
+                'unit': fact['unit'],
+                'period_type': fact['period_type'],
+                'period_start': fact['period_start'],
+                'period_end': fact['period_end'],
+                'period_date': fact['period_date']
+            }
         
         return metrics
     
-    def get_all_facts(self):
-        """Get all facts found in the XBRL file"""
+    def get_all_facts(self) -> List[Fact]:
+        """Get all facts found in the XBRL file (use Fact.as_dict() for dictionaries)"""
         return self.facts
     
-    def get_facts_by_concept(self, concept_name):
+    def get_facts_by_concept(self, concept_name) -> List[Fact]:
         """Get all facts for a specific concept"""
-        return [fact for fact in self.facts if concept_name in fact['concept_name']]
+        return [fact for fact in self.facts if concept_name in fact.concept_name]
     
     def get_summary(self):
         """Get a summary of what was found in the XBRL file"""
@@ -0,0 +1,119 @@
+"""
+Celery tasks for SEC Filing Analyzer
+
+Filing downloads and parsing run in a Celery worker instead of the API process.
+Parsing is CPU-bound, so each filing gets its own parse task and the prefork
+pool (one process per core by default) parses filings in parallel.
+Start a worker from the backend directory with:
+
+    celery -A tasks worker --loglevel=info
+"""
+from celery import Celery
+import asyncio
+from sqlalchemy import delete, insert
+import logging
+
+from database import SessionLocal, is_substantial, section_row, Company, Filing, FilingSection
+from services.sec_client import SECClient
+from services.parser import FilingParser
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+celery_app = Celery('sec', broker=settings.REDIS_URL, backend=settings.REDIS_URL)
+
+sec_client = SECClient()
+
+def save_sections(db, filing: Filing, sections: dict):
+    """Replace a filing's sections with the parsed ones in a single bulk insert"""
+    rows = [
+        section_row(
+            filing.id, section_type, content,
+            section_title=section_type.replace('_', ' ').title()
+        )
+        for section_type, content in sections.items()
+        if is_substantial(content)
+    ]
+    
+    # Clear sections from an earlier run so re-parsing doesn't duplicate them
+    db.execute(delete(FilingSection).where(FilingSection.filing_id == filing.id))
+    if rows:
+        db.execute(insert(FilingSection), rows)
+
+@celery_app.task(name='parse_filing')
+def parse_filing_task(filing_id: int):
+    """Parse a filing's HTML and store its sections"""
+    try:
+        with SessionLocal() as db:
+            filing = db.get(Filing, filing_id)
+            if not filing:
+                return
+            
+            # Parse the filing
+            parser = FilingParser(file_path=filing.html_file_path)
+            sections = parser.extract_all_sections()
+            
+            # Save sections and mark as processed
+            save_sections(db, filing, sections)
+            filing.processed = True
+            db.commit()
+            
+            logger.info(f"Successfully parsed filing {filing_id} with {len(sections)} sections")
+    
+    except Exception as e:
+        logger.error(f"Error parsing filing {filing_id}: {str(e)}")
+
+@celery_app.task(name='sync_company_filings')
+def sync_company_filings_task(company_id: int, form_type: str, download_html: bool):
+    """Fetch a company's latest filings from the SEC and store the new ones"""
+    try:
+        with SessionLocal() as db:
+            company = db.get(Company, company_id)
+            if not company:
+                return
+            
+            # Get latest filings from SEC
+            filings = sec_client.get_company_filings(company.cik, form_type, count=5)
+            
+            new_filings = []
+            for filing_info in filings:
+                # Check if we already have this filing
+                exists = db.query(Filing.id).filter(
+                    Filing.accession_number == filing_info.accession_number
+                ).first()
+                if exists:
+                    continue
+                
+                # Create new filing
+                filing = Filing(
+                    company_id=company.id,
+                    form_type=filing_info.form_type,
+                    filing_date=filing_info.filing_date,
+                    accession_number=filing_info.accession_number,
+                    document_url=filing_info.document_url
+                )
+                db.add(filing)
+                db.commit()
+                db.refresh(filing)
+                logger.info(f"Created new filing: {filing.form_type} for company_id {company.id}")
+                new_filings.append((filing, filing_info))
+            
+            # Download HTML for all new filings concurrently if requested, then hand
+            # parsing to its own task so filings are parsed in parallel across workers
+            if download_html and new_filings:
+                html_paths = asyncio.run(sec_client.download_filings_html_async(
+                    [filing_info for _, filing_info in new_filings]
+                ))
+                for (filing, _), html_path in zip(new_filings, html_paths):
+                    if html_path:
+                        filing.html_file_path = html_path
+                db.commit()
+                
+                for filing, _ in new_filings:
+                    if filing.html_file_path:
+                        parse_filing_task.delay(filing.id)
+            
+            logger.info(f"Successfully synced filings for company {company.name}")
+    
+    except Exception as e:
+        logger.error(f"Error syncing filings for company {company_id}: {str(e)}")
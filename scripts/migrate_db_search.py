@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Database migration script to add the company name full-text search index
+Run this once on databases created before /search used full-text matching
+"""
+
+import sys
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from database import engine, create_search_index, company_name_match, Company, SessionLocal
+
+def main():
+    """Main migration function"""
+    print("🚀 Adding company name search index")
+    print("=" * 50)
+    print(f"🔧 Database dialect: {engine.dialect.name}")
+
+    try:
+        create_search_index()
+        print("✅ Search index created")
+    except Exception as e:
+        print(f"❌ Error creating search index: {e}")
+        return
+
+    # Quick check that the index answers a query
+    try:
+        with SessionLocal() as db:
+            company = db.query(Company).first()
+            if not company:
+                print("⚠️  No companies yet, skipping search check")
+                return
+
+            matches = db.query(Company).filter(company_name_match(company.name)).all()
+            if company in matches:
+                print(f"✅ Search for '{company.name}' returned {len(matches)} companies")
+            else:
+                print(f"⚠️  Search for '{company.name}' did not find it")
+    except Exception as e:
+        print(f"❌ Search check failed: {e}")
+        return
+
+    print("\n🎉 Search index migration completed successfully!")
+
+if __name__ == "__main__":
+    main()
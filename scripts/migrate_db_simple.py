@@ -15,6 +15,7 @@ backend_dir = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_dir))
 
 from config import settings
+from database import add_missing_columns
 
 # Create engine
 engine = create_engine(settings.DATABASE_URL, echo=False)
@@ -58,24 +59,23 @@ def add_metadata_to_filing_sections():
     """Add metadata columns to existing filing_sections table"""
     print("🔧 Adding metadata columns to filing_sections table...")
     
+    columns_to_add = [
+        ("chunk_type", "VARCHAR(50)"),  # text_chunk, chart_complete, table_row
+        ("standard_type", "VARCHAR(50)"),  # risk_factors, balance_sheet, etc.
+        ("company_context", "VARCHAR(200)"),  # company name for RAG context
+        ("content_hash", "VARCHAR(64)"),  # for deduplication
+    ]
+    
     try:
-        with engine.connect() as conn:
-            # Add new columns one by one (safe if they already exist)
-            columns_to_add = [
-                ("chunk_type", "VARCHAR(50)"),  # text_chunk, chart_complete, table_row
-                ("standard_type", "VARCHAR(50)"),  # risk_factors, balance_sheet, etc.
-                ("company_context", "VARCHAR(200)"),  # company name for RAG context
-                ("content_hash", "VARCHAR(64)"),  # for deduplication
-            ]
-            
-            for column_name, column_type in columns_to_add:
-                try:
-                    conn.execute(text(f"ALTER TABLE filing_sections ADD COLUMN {column_name} {column_type}"))
-                    print(f"✅ Added {column_name} column")
-                except Exception:
-                    print(f"⚠️  {column_name} column already exists or failed to add")
-            
-            conn.commit()
+        # Add only the missing columns in one transaction (rolled back on failure)
+        with engine.begin() as conn:
+            added = add_missing_columns(conn, "filing_sections", columns_to_add)
+        
+        for column_name, _ in columns_to_add:
+            if column_name in added:
+                print(f"✅ Added {column_name} column")
+            else:
+                print(f"⚠️  {column_name} column already exists")
         
         print("✅ Updated filing_sections table successfully")
         return True
@@ -118,6 +118,24 @@ def create_filing_charts_table():
         print(f"❌ Error creating filing_charts table: {e}")
         return False
 
+def add_composite_indexes():
+    """Add composite indexes matching the API's filing and section lookups"""
+    print("🔧 Adding composite indexes...")
+    
+    try:
+        with engine.begin() as conn:
+            # Company filing lists: filter by company, newest first
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_filings_company_date ON filings(company_id, filing_date DESC)"))
+            # Section lookups by filing and section type
+            conn.execute(text("CREATE INDEX IF NOT EXISTS idx_sections_filing_type ON filing_sections(filing_id, section_type)"))
+        
+        print("✅ Added composite indexes successfully")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Error adding composite indexes: {e}")
+        return False
+
 def drop_xbrl_tables():
     """Drop the complex XBRL tables we don't need"""
     print("🗑️  Dropping unused XBRL tables...")
@@ -210,12 +228,17 @@ def main():
         print("❌ Failed to create filing_charts table")
         return
     
-    # Step 3: Drop unused XBRL tables
+    # Step 3: Add composite indexes for filing and section lookups
+    if not add_composite_indexes():
+        print("❌ Failed to add composite indexes")
+        return
+    
+    # Step 4: Drop unused XBRL tables
     if not drop_xbrl_tables():
         print("❌ Failed to drop XBRL tables")
         return
     
-    # Step 4: Test the new schema
+    # Step 5: Test the new schema
     if not test_new_schema():
         print("❌ Schema test failed")
         return
@@ -223,8 +246,8 @@ def main():
     print("\n🎉 Database schema cleanup completed successfully!")
     print("\nUpdated schema:")
     print("✓ companies - unchanged")
-    print("✓ filings - unchanged") 
-    print("✓ filing_sections - added metadata columns")
+    print("✓ filings - added (company_id, filing_date) index")
+    print("✓ filing_sections - added metadata columns and (filing_id, section_type) index")
     print("✓ filing_charts - new table for R# chart elements")
     print("✓ analyses - unchanged")
     print("✗ Removed: xbrl_facts, xbrl_concepts, financial_statements")
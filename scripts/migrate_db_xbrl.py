@@ -11,43 +11,30 @@ from pathlib import Path
 backend_dir = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_dir))
 
-from sqlalchemy import create_engine, text
-from database import Base, engine
+from database import Base, engine, add_missing_columns
 
 def add_xbrl_tables():
     """Add XBRL tables to existing database"""
     
     print("🔧 Adding XBRL support to your database...")
     
+    columns_to_add = [
+        ("xbrl_file_path", "VARCHAR(500)"),
+        ("filing_summary_path", "VARCHAR(500)"),
+        ("has_xbrl", "BOOLEAN DEFAULT FALSE"),
+        ("xbrl_processed", "BOOLEAN DEFAULT FALSE"),
+    ]
+    
     try:
-        # First, let's add the new columns to the existing filings table
-        with engine.connect() as conn:
-            # Add new columns one by one (this is safe if they already exist)
-            try:
-                conn.execute(text("ALTER TABLE filings ADD COLUMN xbrl_file_path VARCHAR(500)"))
-                print("✅ Added xbrl_file_path column")
-            except Exception:
-                print("⚠️  xbrl_file_path column already exists")
-            
-            try:
-                conn.execute(text("ALTER TABLE filings ADD COLUMN filing_summary_path VARCHAR(500)"))
-                print("✅ Added filing_summary_path column")
-            except Exception:
-                print("⚠️  filing_summary_path column already exists")
-            
-            try:
-                conn.execute(text("ALTER TABLE filings ADD COLUMN has_xbrl BOOLEAN DEFAULT FALSE"))
-                print("✅ Added has_xbrl column")
-            except Exception:
-                print("⚠️  has_xbrl column already exists")
-            
-            try:
-                conn.execute(text("ALTER TABLE filings ADD COLUMN xbrl_processed BOOLEAN DEFAULT FALSE"))
-                print("✅ Added xbrl_processed column")
-            except Exception:
-                print("⚠️  xbrl_processed column already exists")
-            
-            conn.commit()
+        # Add only the missing columns to the filings table in one transaction
+        with engine.begin() as conn:
+            added = add_missing_columns(conn, "filings", columns_to_add)
+        
+        for column_name, _ in columns_to_add:
+            if column_name in added:
+                print(f"✅ Added {column_name} column")
+            else:
+                print(f"⚠️  {column_name} column already exists")
         
         print("✅ Updated filings table successfully")
         
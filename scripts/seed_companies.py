@@ -2,8 +2,11 @@
 """
 Seed database with sample companies and fetch their latest filings
 """
-import json
+import logging
+import orjson
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 
@@ -12,19 +15,46 @@ backend_dir = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_dir))
 
 # Now the imports should work
-from database import DatabaseManager, Filing, FilingSection
+from sqlalchemy import func, insert
+
+from database import DatabaseManager, is_substantial, section_row, Company, Filing, FilingSection
 from config import COMPANIES_FILE
-from services.sec_client import SECClient
+from services.sec_client import SECClient, format_cik
+
+# Per-company and per-filing progress goes through this logger rather than print,
+# as bare messages on stdout.
+logger = logging.getLogger("seed_companies")
+logger.setLevel(logging.INFO)
+logger.propagate = False
+_progress_handler = logging.StreamHandler(sys.stdout)
+_progress_handler.setFormatter(logging.Formatter('%(message)s'))
+logger.addHandler(_progress_handler)
 
 def load_companies_from_file():
-    """Load companies from JSON file"""
+    """
+    Load companies from JSON file
+    
+    CIKs are zero-padded and symbols upper-cased once here, and duplicate
+    CIKs collapse to the last entry, so later steps get clean, unique rows.
+    """
     if not COMPANIES_FILE.exists():
         print(f"❌ Companies file not found: {COMPANIES_FILE}")
         print("Run 'python scripts/setup_db.py' first to create the file")
         return []
     
-    with open(COMPANIES_FILE, 'r') as f:
-        companies = json.load(f)
+    with open(COMPANIES_FILE, 'rb') as f:
+        raw_companies = orjson.loads(f.read())
+    
+    companies = {}
+    for company_data in raw_companies:
+        cik = format_cik(company_data['cik'])
+        symbol = company_data.get('symbol')
+        companies[cik] = {
+            **company_data,
+            'cik': cik,
+            'symbol': symbol.strip().upper() if symbol else None
+        }
+    companies = list(companies.values())
     
     print(f"📁 Loaded {len(companies)} companies from {COMPANIES_FILE}")
     return companies
@@ -38,25 +68,64 @@ def seed_companies():
         return
     
     with DatabaseManager() as db:
+        # One query for the companies we already have instead of a lookup per company
+        existing_ciks = {cik for (cik,) in db.db.query(Company.cik)}
+        
         for company_data in companies:
+            if company_data['cik'] in existing_ciks:
+                logger.info(f"✅ Already present: {company_data['name']} (CIK: {company_data['cik']})")
+                continue
+            
             try:
                 company = db.get_or_create_company(
                     name=company_data['name'],
                     cik=company_data['cik'],
-                    symbol=company_data.get('symbol')
+                    symbol=company_data['symbol']
                 )
                 
-                print(f"✅ Added/Updated: {company.name} (CIK: {company.cik})")
+                logger.info(f"✅ Added/Updated: {company.name} (CIK: {company.cik})")
                 
             except Exception as e:
-                print(f"❌ Error adding company {company_data.get('name', 'Unknown')}: {str(e)}")
+                logger.error(f"❌ Error adding company {company_data.get('name', 'Unknown')}: {str(e)}")
     
     print("🌱 Company seeding complete!")
 
+# Companies fetched concurrently; SECClient's rate limiter keeps the total under SEC's limit
+FETCH_WORKERS = 8
+
+def _process_company(sec_client: SECClient, cik: str, form_type: str,
+                     download_html: bool, known_accessions: frozenset):
+    """
+    Fetch a company's latest filing (and its HTML) without touching the database
+    
+    Args:
+        sec_client: Client shared by all worker threads
+        cik: Company CIK
+        form_type: Type of filing to fetch
+        download_html: Whether to download the HTML file
+        known_accessions: Accession numbers already stored
+        
+    Returns:
+        Tuple of (latest FilingInfo or None, HTML path or None, download error or None)
+    """
+    latest_filing = sec_client.get_latest_filing(cik, form_type)
+    if not latest_filing or latest_filing.accession_number in known_accessions:
+        return latest_filing, None, None
+    
+    if not download_html:
+        return latest_filing, None, None
+    
+    try:
+        return latest_filing, sec_client.download_filing_html(latest_filing), None
+    except Exception as e:
+        return latest_filing, None, e
+
 def fetch_latest_filings(form_type: str = "10-K", download_html: bool = False):
     """
     Fetch latest filings for all companies in the database
     
+    SEC requests run in a thread pool; all database writes stay on the main thread.
+    
     Args:
         form_type: Type of filing to fetch (10-K, 10-Q, etc.)
         download_html: Whether to download the HTML files
@@ -66,61 +135,130 @@ def fetch_latest_filings(form_type: str = "10-K", download_html: bool = False):
     sec_client = SECClient()
     
     with DatabaseManager() as db:
-        companies = db.get_all_companies()
+        # Plain values only: ORM objects must not be read from worker threads
+        companies = [(c.id, c.name, c.cik) for c in db.get_all_companies()]
+        known_accessions = frozenset(
+            accession for (accession,) in db.db.query(Filing.accession_number)
+        )
         
-        for company in companies:
-            try:
-                print(f"\n📊 Processing {company.name} (CIK: {company.cik})...")
-                
-                # Get latest filing
-                latest_filing = sec_client.get_latest_filing(company.cik, form_type)
-                
-                if not latest_filing:
-                    print(f"  ⚠️  No {form_type} filing found for {company.name}")
-                    continue
-                
-                # Check if we already have this filing
-                existing_filing = db.get_filing_by_accession(latest_filing.accession_number)
-                if existing_filing:
-                    print(f"  ✅ Filing {latest_filing.accession_number} already exists")
-                    continue
-                
-                # Create new filing record
-                filing = db.create_filing(
-                    company_id=company.id,
-                    form_type=latest_filing.form_type,
-                    filing_date=latest_filing.filing_date,
-                    accession_number=latest_filing.accession_number,
-                    document_url=latest_filing.document_url
-                )
-                
-                print(f"  ✅ Added filing: {filing.form_type} ({filing.filing_date})")
-                
-                # Download HTML if requested
-                if download_html:
-                    try:
-                        html_path = sec_client.download_filing_html(latest_filing)
-                        if html_path:
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as executor:
+            futures = {
+                executor.submit(_process_company, sec_client, cik, form_type,
+                                download_html, known_accessions): (company_id, name, cik)
+                for company_id, name, cik in companies
+            }
+            
+            for future in as_completed(futures):
+                company_id, name, cik = futures[future]
+                try:
+                    logger.info(f"\n📊 Processing {name} (CIK: {cik})...")
+                    
+                    latest_filing, html_path, download_error = future.result()
+                    
+                    if not latest_filing:
+                        logger.warning(f"  ⚠️  No {form_type} filing found for {name}")
+                        continue
+                    
+                    # Check if we already have this filing
+                    if latest_filing.accession_number in known_accessions:
+                        logger.info(f"  ✅ Filing {latest_filing.accession_number} already exists")
+                        continue
+                    
+                    # Create new filing record
+                    filing = db.create_filing(
+                        company_id=company_id,
+                        form_type=latest_filing.form_type,
+                        filing_date=latest_filing.filing_date,
+                        accession_number=latest_filing.accession_number,
+                        document_url=latest_filing.document_url
+                    )
+                    
+                    logger.info(f"  ✅ Added filing: {filing.form_type} ({filing.filing_date})")
+                    
+                    # Record the downloaded HTML if requested
+                    if download_html:
+                        if download_error:
+                            logger.error(f"  ❌ Error downloading HTML: {str(download_error)}")
+                        elif html_path:
                             filing.html_file_path = html_path
                             db.db.commit()
-                            print(f"  📄 Downloaded HTML: {html_path}")
+                            logger.info(f"  📄 Downloaded HTML: {html_path}")
                         else:
-                            print(f"  ⚠️  Failed to download HTML for {filing.accession_number}")
-                    except Exception as e:
-                        print(f"  ❌ Error downloading HTML: {str(e)}")
-                
-            except Exception as e:
-                print(f"❌ Error processing {company.name}: {str(e)}")
-                continue
+                            logger.warning(f"  ⚠️  Failed to download HTML for {filing.accession_number}")
+                    
+                except Exception as e:
+                    logger.error(f"❌ Error processing {name}: {str(e)}")
+                    continue
     
     print(f"\n📄 Finished fetching {form_type} filings!")
 
-def parse_downloaded_filings():
-    """Parse any downloaded HTML files"""
-    print("🔍 Parsing downloaded HTML files...")
+def _parse_filing(html_file_path: str):
+    """
+    Parse one filing's HTML in a worker process
     
+    Args:
+        html_file_path: Path to the downloaded HTML
+        
+    Returns:
+        Tuple of (sections dict or None, parse error or None)
+    """
     from services.parser import FilingParser
+    
+    try:
+        parser = FilingParser(file_path=html_file_path)
+        return dict(parser.extract_all_sections()), None
+    except Exception as e:
+        return None, e
+
+# Filings saved per transaction when storing parsed sections
+PARSE_COMMIT_BATCH_SIZE = 50
+
+def _save_parsed_batch(db, batch):
+    """
+    Store sections for a batch of parsed filings in one transaction
+    
+    If the batch fails, it's rolled back and each filing is retried in a
+    transaction of its own so one bad filing doesn't lose the others.
+    
+    Args:
+        db: DatabaseManager
+        batch: List of (filing, section rows) tuples
+    """
+    def write(filing, rows):
+        if rows:
+            db.db.execute(insert(FilingSection), rows)
+        filing.processed = True
+    
+    try:
+        for filing, rows in batch:
+            write(filing, rows)
+        db.db.commit()
+        return
+    except Exception as e:
+        db.db.rollback()
+        if len(batch) == 1:
+            logger.error(f"❌ Error saving filing {batch[0][0].accession_number}: {str(e)}")
+            return
+        logger.warning(f"⚠️  Batch commit failed ({str(e)}), retrying filings one at a time")
+    
+    for filing, rows in batch:
+        try:
+            write(filing, rows)
+            db.db.commit()
+        except Exception as e:
+            db.db.rollback()
+            logger.error(f"❌ Error saving filing {filing.accession_number}: {str(e)}")
 
+def parse_downloaded_filings():
+    """
+    Parse any downloaded HTML files
+    
+    Parsing is CPU-bound, so filings are parsed in a process pool; sections are
+    saved from the main process so the session never crosses a process boundary,
+    PARSE_COMMIT_BATCH_SIZE filings per commit.
+    """
+    print("🔍 Parsing downloaded HTML files...")
+    
     with DatabaseManager() as db:
         # Get all filings that have HTML files but haven't been processed
         filings = db.db.query(Filing).filter(
@@ -128,38 +266,49 @@ def parse_downloaded_filings():
             Filing.processed == False
         ).all()
         
+        pending = []
         for filing in filings:
-            try:
-                print(f"\n📊 Parsing filing: {filing.form_type} for company_id {filing.company_id}")
+            if Path(filing.html_file_path).exists():
+                pending.append(filing)
+            else:
+                logger.warning(f"  ⚠️  HTML file not found: {filing.html_file_path}")
+        
+        if not pending:
+            print("\n🔍 Finished parsing filings!")
+            return
+        
+        batch = []
+        workers = min(len(pending), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_parse_filing, [f.html_file_path for f in pending], chunksize=2)
+            
+            for filing, (sections, parse_error) in zip(pending, results):
+                logger.info(f"\n📊 Parsing filing: {filing.form_type} for company_id {filing.company_id}")
                 
-                if not Path(filing.html_file_path).exists():
-                    print(f"  ⚠️  HTML file not found: {filing.html_file_path}")
+                if parse_error:
+                    logger.error(f"❌ Error parsing filing {filing.accession_number}: {str(parse_error)}")
                     continue
                 
-                # Parse the filing
-                parser = FilingParser(file_path=filing.html_file_path)
-                sections = parser.extract_all_sections()
-                
-                # Save sections to database
-                for section_type, content in sections.items():
-                    if content and len(content.strip()) > 50:  # Only save substantial content
-                        db.create_section(
-                            filing_id=filing.id,
-                            section_type=section_type,
-                            content=content,
-                            section_title=section_type.replace('_', ' ').title()
-                        )
-                        print(f"  ✅ Saved section: {section_type}")
-                
-                # Mark filing as processed
-                filing.processed = True
-                db.db.commit()
+                # Keep substantial sections for the next bulk insert
+                rows = [
+                    section_row(
+                        filing.id, section_type, content,
+                        section_title=section_type.replace('_', ' ').title()
+                    )
+                    for section_type, content in sections.items()
+                    if is_substantial(content)
+                ]
+                for row in rows:
+                    logger.info(f"  ✅ Parsed section: {row['section_type']}")
+                logger.info(f"  ✅ Processed filing with {len(sections)} sections")
                 
-                print(f"  ✅ Processed filing with {len(sections)} sections")
-                
-            except Exception as e:
-                print(f"❌ Error parsing filing {filing.accession_number}: {str(e)}")
-                continue
+                batch.append((filing, rows))
+                if len(batch) >= PARSE_COMMIT_BATCH_SIZE:
+                    _save_parsed_batch(db, batch)
+                    batch = []
+        
+        if batch:
+            _save_parsed_batch(db, batch)
     
     print("\n🔍 Finished parsing filings!")
 
@@ -169,18 +318,29 @@ def show_database_summary():
     print("=" * 50)
     
     with DatabaseManager() as db:
-        companies = db.get_all_companies()
+        # One aggregate query: a row per filing (or per company with no filings)
+        # with its section count, instead of a filings and a sections query per company
+        rows = db.db.query(
+            Company.id, Company.name, Company.symbol,
+            Filing.id, Filing.form_type, Filing.filing_date,
+            func.count(FilingSection.id)
+        ).outerjoin(Filing, Filing.company_id == Company.id).outerjoin(
+            FilingSection, FilingSection.filing_id == Filing.id
+        ).group_by(Company.id, Filing.id).order_by(Company.id, Filing.filing_date.desc()).all()
+        
+        companies = {}
+        for company_id, name, symbol, filing_id, form_type, filing_date, section_count in rows:
+            filings = companies.setdefault(company_id, (name, symbol, []))[2]
+            if filing_id is not None:
+                filings.append((form_type, filing_date, section_count))
+        
         print(f"Companies: {len(companies)}")
         
-        for company in companies:
-            filings = db.get_company_filings(company.id)
-            print(f"  {company.name} ({company.symbol}): {len(filings)} filings")
+        for name, symbol, filings in companies.values():
+            print(f"  {name} ({symbol}): {len(filings)} filings")
             
-            for filing in filings[:3]:  # Show first 3 filings
-                sections = db.db.query(FilingSection).filter(
-                    FilingSection.filing_id == filing.id
-                ).all()
-                print(f"    {filing.form_type} ({filing.filing_date.strftime('%Y-%m-%d')}): {len(sections)} sections")
+            for form_type, filing_date, section_count in filings[:3]:  # Show first 3 filings
+                print(f"    {form_type} ({filing_date.strftime('%Y-%m-%d')}): {section_count} sections")
 
 def main():
     """Main function with command line interface"""
@@ -6,7 +6,7 @@ Run this script to initialize the database and create tables.
 
 import os
 import sys
-import json
+import orjson
 from pathlib import Path
 
 # Add the backend directory to Python path
@@ -67,8 +67,8 @@ def create_sample_companies_file():
             }
         ]
         
-        with open(COMPANIES_FILE, 'w') as f:
-            json.dump(sample_companies, f, indent=2)
+        with open(COMPANIES_FILE, 'wb') as f:
+            f.write(orjson.dumps(sample_companies, option=orjson.OPT_INDENT_2))
         
         print(f"✅ Created sample companies file: {COMPANIES_FILE}")
 
@@ -3,13 +3,22 @@
 Enhanced XBRL test with multiple companies and better detection
 """
 
+import io
+import os
+import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 
 # Add backend to path
 backend_dir = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_dir))
 
+# Document type, description or URL fragments that point at XBRL data
+_XBRL_INDICATOR_RE = re.compile(r'ex-101\.ins|instance|xbrl|\.xml|ex-101|inline', re.IGNORECASE)
+_XBRL_INSTANCE_RE = re.compile(r'ex-101\.ins', re.IGNORECASE)
+
 def enhanced_xbrl_detection(sec_client, filing_info):
     """Enhanced XBRL detection that looks for more file types"""
     try:
@@ -19,28 +28,19 @@ def enhanced_xbrl_detection(sec_client, filing_info):
         for i, doc in enumerate(documents[:10]):  # Show first 10 documents
             print(f"    {i+1}. {doc['type']} - {doc['description']}")
         
-        # Look for various XBRL indicators
-        xbrl_indicators = [
-            'ex-101.ins',
-            'instance',
-            'xbrl',
-            '.xml',
-            'ex-101',
-            'inline'
-        ]
-        
+        # One scan per document over all its fields instead of one per indicator
         xbrl_docs = []
         for doc in documents:
-            doc_type = doc['type'].lower()
-            doc_desc = doc['description'].lower()
-            doc_url = doc['url'].lower()
+            fields = f"{doc['type']}\0{doc['description']}\0{doc['url']}"
             
-            for indicator in xbrl_indicators:
-                if (indicator in doc_type or 
-                    indicator in doc_desc or 
-                    indicator in doc_url):
-                    xbrl_docs.append(doc)
-                    break
+            # A filing has at most one instance document, and it's the best match,
+            # so stop scanning as soon as it turns up
+            if _XBRL_INSTANCE_RE.search(fields):
+                print(f"  ✅ Found XBRL instance document: {doc['type']}: {doc['description']}")
+                return True, doc
+            
+            if _XBRL_INDICATOR_RE.search(fields):
+                xbrl_docs.append(doc)
         
         if xbrl_docs:
             print(f"  ✅ Found {len(xbrl_docs)} potential XBRL documents:")
@@ -87,6 +87,39 @@ def test_company_xbrl(sec_client, company_name, cik, symbol):
         print(f"  ❌ Error testing {company_name}: {e}")
         return None
 
+# SECClient for the current pool worker, built once by _init_probe_worker
+_worker_client = None
+
+def _init_probe_worker(workers):
+    """
+    Process-pool initializer: build the one SECClient this worker reuses for every probe
+    
+    Args:
+        workers: Number of clients sharing the SEC rate limit
+    """
+    global _worker_client
+    from services.sec_client import SECClient, SEC_REQUESTS_PER_SECOND, sec_rate_limiter
+    
+    # Each process has its own token bucket, so give it an equal share of
+    # SEC's limit to keep the combined rate under it
+    sec_rate_limiter.rate = SEC_REQUESTS_PER_SECOND / workers
+    _worker_client = SECClient()
+
+def probe_company_xbrl(company):
+    """
+    Process-pool entry point: run test_company_xbrl with the worker's client
+    
+    Args:
+        company: (company_name, cik, symbol) tuple
+        
+    Returns:
+        Tuple of (captured output, test_company_xbrl result)
+    """
+    output = io.StringIO()
+    with redirect_stdout(output):
+        result = test_company_xbrl(_worker_client, *company)
+    return output.getvalue(), result
+
 def download_and_parse_xbrl(sec_client, filing, xbrl_doc):
     """Download and parse XBRL data"""
     try:
@@ -98,8 +131,6 @@ def download_and_parse_xbrl(sec_client, filing, xbrl_doc):
         print(f"  Description: {xbrl_doc['description']}")
         print(f"  URL: {xbrl_doc['url']}")
         
-        response = sec_client._make_request(xbrl_doc['url'])
-        
         # Save the file
         filename = f"{filing.cik}_{filing.accession_number}_xbrl.xml"
         file_path = Path("data/filings") / filename
@@ -107,18 +138,19 @@ def download_and_parse_xbrl(sec_client, filing, xbrl_doc):
         # Create directory if it doesn't exist
         file_path.parent.mkdir(parents=True, exist_ok=True)
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(response.text)
+        # Stream to disk rather than holding the whole document in memory;
+        # the first few KB come back for the format check
+        head = sec_client.download_to_file(xbrl_doc['url'], file_path)
         
         print(f"  ✅ Downloaded to: {file_path}")
         
         # Check if it's actually XML
-        if not response.text.strip().startswith('<?xml'):
+        if not head.lstrip().startswith(b'<?xml'):
             print(f"  ⚠️  Warning: File doesn't look like XML")
-            print(f"  First 200 chars: {response.text[:200]}")
+            print(f"  First 200 chars: {head[:200].decode('utf-8', errors='replace')}")
             
             # If it's HTML, it might be an inline XBRL
-            if '<html' in response.text.lower():
+            if b'<html' in head[:1024].lower():
                 print(f"  💡 This appears to be inline XBRL (HTML format)")
                 return file_path, "inline_xbrl"
             else:
@@ -174,32 +206,47 @@ def test_multiple_companies():
     ]
     
     try:
-        from services.sec_client import SECClient
+        from services.sec_client import SECClient, SEC_REQUESTS_PER_SECOND, sec_rate_limiter
         
         sec_client = SECClient()
         
         successful_tests = []
         
-        for company_name, cik, symbol in companies:
-            result = test_company_xbrl(sec_client, company_name, cik, symbol)
+        # Probe all companies in parallel; each worker builds one client and keeps
+        # its connection pool across the companies it probes. The main process
+        # downloads while probes are still running, so it takes a share of the
+        # SEC rate limit as well.
+        workers = min(len(companies), os.cpu_count() or 1)
+        clients = workers + 1
+        sec_rate_limiter.rate = SEC_REQUESTS_PER_SECOND / clients
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_probe_worker,
+                                 initargs=(clients,)) as executor:
+            # map yields each probe as soon as it's done, so a company's download and
+            # parse overlap the probes of the companies after it
+            probes = executor.map(probe_company_xbrl, companies)
             
-            if result:
-                filing, xbrl_doc = result
-                print(f"\n🎯 Found XBRL data for {company_name}! Testing download and parsing...")
-                
-                file_path, parse_result = download_and_parse_xbrl(sec_client, filing, xbrl_doc)
+            for (company_name, cik, symbol), (output, result) in zip(companies, probes):
+                print(output, end='')
                 
-                if file_path:
-                    successful_tests.append({
-                        'company': company_name,
-                        'symbol': symbol,
-                        'filing': filing,
-                        'file_path': file_path,
-                        'parse_result': parse_result
-                    })
+                if result:
+                    filing, xbrl_doc = result
+                    print(f"\n🎯 Found XBRL data for {company_name}! Testing download and parsing...")
+                    
+                    file_path, parse_result = download_and_parse_xbrl(sec_client, filing, xbrl_doc)
                     
-                    # Stop after first successful test
-                    break
+                    if file_path:
+                        successful_tests.append({
+                            'company': company_name,
+                            'symbol': symbol,
+                            'filing': filing,
+                            'file_path': file_path,
+                            'parse_result': parse_result
+                        })
+                        
+                        # Stop after first successful test, dropping probes not yet started
+                        executor.shutdown(wait=False, cancel_futures=True)
+                        break
         
         # Summary
         print(f"\n📊 Test Summary:")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test database.fetch_mappings with the compare endpoint's IN (...) select
+"""
+
+import asyncio
+import re
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# Add backend to path
+backend_dir = Path(__file__).parent.parent / "backend"
+sys.path.insert(0, str(backend_dir))
+
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from database import Base, Company, Filing, FilingSection, compile_for_asyncpg, fetch_mappings, section_previews_stmt
+
+def test_asyncpg_compile_with_in():
+    """The asyncpg fast path must send one argument per $n placeholder"""
+    print("🐘 Testing asyncpg compilation of an IN (...) select...")
+    
+    try:
+        compiled = compile_for_asyncpg(section_previews_stmt([1, 2, 3], "risk_factors"), PGDialect_asyncpg())
+        if compiled is None:
+            print("  ⚠️  Statement fell back to SQLAlchemy execution")
+            return True
+        
+        sql, params = compiled
+        placeholders = set(re.findall(r'\$(\d+)', sql))
+        
+        if 'POSTCOMPILE' in sql:
+            print(f"  ❌ Unexpanded IN placeholder left in SQL: {sql}")
+            return False
+        if len(placeholders) != len(params):
+            print(f"  ❌ {len(params)} params for {len(placeholders)} placeholders")
+            return False
+        
+        print(f"  ✅ {len(params)} params for {len(placeholders)} placeholders")
+        return True
+    
+    except Exception as e:
+        print(f"  ❌ Compilation failed: {e}")
+        return False
+
+async def _run_in_clause_on_sqlite():
+    """Seed an in-memory database and run the compare select through fetch_mappings"""
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        
+        async with async_sessionmaker(engine)() as db:
+            await db.execute(insert(Company), [{'id': 1, 'name': 'Test Co', 'cik': '0000000001'}])
+            await db.execute(insert(Filing), [
+                {'id': filing_id, 'company_id': 1, 'form_type': '10-K',
+                 'filing_date': datetime(2024, 1, filing_id), 'accession_number': f'acc-{filing_id}'}
+                for filing_id in (1, 2, 3)
+            ])
+            await db.execute(insert(FilingSection), [
+                {'filing_id': filing_id, 'section_type': 'risk_factors', 'content': 'x' * (100 * filing_id)}
+                for filing_id in (1, 2, 3)
+            ])
+            await db.commit()
+            
+            return await fetch_mappings(db, section_previews_stmt([1, 3], "risk_factors"))
+    finally:
+        await engine.dispose()
+
+def test_fetch_mappings_in_clause():
+    """fetch_mappings must return only the rows matched by the IN list"""
+    print("🗄️  Testing fetch_mappings with an IN (...) select...")
+    
+    try:
+        rows = asyncio.run(_run_in_clause_on_sqlite())
+        found = [(row['filing_id'], row['content_length']) for row in rows]
+        
+        if found != [(1, 100), (3, 300)]:
+            print(f"  ❌ Unexpected rows: {found}")
+            return False
+        
+        print(f"  ✅ Returned {len(rows)} rows for filings 1 and 3")
+        return True
+    
+    except Exception as e:
+        print(f"  ❌ fetch_mappings failed: {e}")
+        return False
+
+def main():
+    """Main test function"""
+    print("🧪 Testing fetch_mappings")
+    print("=" * 50)
+    
+    tests = [
+        ("asyncpg Compilation", test_asyncpg_compile_with_in),
+        ("IN Clause Query", test_fetch_mappings_in_clause),
+    ]
+    
+    passed = 0
+    for test_name, test_func in tests:
+        print(f"\n{test_name}:")
+        print("-" * 20)
+        if test_func():
+            passed += 1
+    
+    print(f"\n📊 Test Results: {passed}/{len(tests)} tests passed")
+    sys.exit(0 if passed == len(tests) else 1)
+
+if __name__ == "__main__":
+    main()
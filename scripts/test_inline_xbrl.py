@@ -26,7 +26,7 @@ def test_inline_xbrl():
     try:
         from services.sec_client import SECClient
         from services.inline_xbrl_parser import InlineXBRLParser
-        from database import DatabaseManager
+        from database import DatabaseManager, Filing
         
         sec_client = SECClient()
         successful_tests = []
@@ -92,37 +92,20 @@ def test_inline_xbrl():
                         symbol=symbol
                     )
                     
-                    # Create filing record
-                    db_filing = db.create_filing(
+                    # Create the filing with its HTML path in a single commit.
+                    # Key metrics aren't stored: the simplified schema has no XBRL fact table.
+                    db_filing = Filing(
                         company_id=company.id,
                         form_type=filing.form_type,
                         filing_date=filing.filing_date,
                         accession_number=filing.accession_number,
-                        document_url=filing.document_url
+                        document_url=filing.document_url,
+                        html_file_path=html_path
                     )
-                    
-                    # Update with XBRL info
-                    db_filing.html_file_path = html_path
-                    db_filing.has_xbrl = True
-                    db_filing.xbrl_processed = True
+                    db.db.add(db_filing)
                     db.db.commit()
                     
-                    # Store key facts
-                    facts_stored = 0
-                    for metric_name, metric_info in summary['key_metrics'].items():
-                        try:
-                            fact = db.create_xbrl_fact(
-                                filing_id=db_filing.id,
-                                concept_name=metric_info['concept'],
-                                value=str(metric_info['value']),
-                                unit_ref=metric_info['unit'] or '',
-                                is_monetary='usd' in (metric_info['unit'] or '').lower()
-                            )
-                            facts_stored += 1
-                        except Exception as e:
-                            print(f"    ⚠️  Failed to store fact {metric_name}: {e}")
-                    
-                    print(f"  ✅ Stored filing (ID: {db_filing.id}) with {facts_stored} key facts")
+                    print(f"  ✅ Stored filing (ID: {db_filing.id}) with {summary['key_metrics_found']} key metrics parsed")
                 
                 successful_tests.append({
                     'company': company_name,
@@ -158,7 +141,7 @@ def test_inline_xbrl():
             print(f"  ✓ Downloaded real SEC HTML filings")
             print(f"  ✓ Parsed inline XBRL data from HTML")
             print(f"  ✓ Extracted key financial metrics")
-            print(f"  ✓ Stored data in database")
+            print(f"  ✓ Stored filing in database")
             
             print(f"\n🚀 Next steps:")
             print(f"  1. Add more companies to database")
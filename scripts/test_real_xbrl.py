@@ -3,151 +3,178 @@
 Test with real XBRL data (simplified version)
 """
 
+import asyncio
+import logging
 import sys
 from pathlib import Path
+from typing import Any, Dict, Optional
 
 # Add backend to path
 backend_dir = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_dir))
 
-def test_real_xbrl_data():
-    """Test downloading and parsing real XBRL data"""
+# Progress goes through its own logger so -q can silence it and the backend's
+# logging setup is left alone
+log = logging.getLogger("xbrltest")
+log.setLevel(logging.INFO)
+log.propagate = False
+_handler = logging.StreamHandler(sys.stdout)
+_handler.setFormatter(logging.Formatter('%(message)s'))
+log.addHandler(_handler)
+
+def test_real_xbrl_data() -> Optional[Dict[str, Any]]:
+    """
+    Test downloading and parsing real XBRL data
+    
+    Returns:
+        What the run found (filing, XBRL file, fact counts, key metrics and
+        stored filing id), or None if any step failed
+    """
     
-    print("🧪 Testing with Real XBRL Data")
-    print("=" * 50)
+    log.info("🧪 Testing with Real XBRL Data")
+    log.info("=" * 50)
     
     try:
-        from services.sec_client import SECClient
-        from services.simple_xbrl_parser import SimpleXBRLParser
+        from services.sec_client import get_sec_client
+        from services.simple_xbrl_parser import SimpleXBRLParser, KEY_CONCEPT_PATTERNS
         from database import DatabaseManager
         
-        # Step 1: Get a recent filing
-        print("\n1. Getting recent Apple 10-K filing...")
+        # Step 1: Get recent filings (once, so the XBRL fallback needs no second request)
+        log.info("\n1. Getting recent Apple 10-K filings...")
         
-        sec_client = SECClient()
-        filings = sec_client.get_company_filings("0000320193", "10-K", count=1)
+        sec_client = get_sec_client()
+        filings = sec_client.get_company_filings("0000320193", "10-K", count=5)
         
         if not filings:
-            print("❌ No filings found")
-            return False
+            log.error("❌ No filings found")
+            return None
         
-        filing = filings[0]
-        print(f"✅ Found filing: {filing.form_type} from {filing.filing_date}")
+        log.info(f"✅ Found {len(filings)} filings, latest: {filings[0].form_type} from {filings[0].filing_date}")
         
-        # Step 2: Check if it has XBRL
-        print("\n2. Checking for XBRL data...")
+        # Step 2: Find the most recent filing with XBRL
+        log.info("\n2. Checking for XBRL data...")
         
-        has_xbrl = sec_client.check_filing_has_xbrl(filing)
-        print(f"✅ XBRL available: {has_xbrl}")
+        # Probe all candidates concurrently, then take the newest one with XBRL
+        xbrl_flags = asyncio.run(sec_client.check_filings_have_xbrl_async(filings))
+        for candidate, has_xbrl in zip(filings, xbrl_flags):
+            log.info(f"Filing from {candidate.filing_date}: XBRL = {has_xbrl}")
         
-        if not has_xbrl:
-            print("⚠️  This filing doesn't have XBRL data")
-            print("Let's try a different year...")
-            
-            # Try 2023
-            filings_2023 = sec_client.get_company_filings("0000320193", "10-K", count=5)
-            for f in filings_2023:
-                if "2023" in str(f.filing_date):
-                    filing = f
-                    has_xbrl = sec_client.check_filing_has_xbrl(filing)
-                    print(f"Trying filing from {filing.filing_date}: XBRL = {has_xbrl}")
-                    if has_xbrl:
-                        break
-        
-        if not has_xbrl:
-            print("❌ No XBRL data found in recent filings")
-            return False
+        filing = next((f for f, has_xbrl in zip(filings, xbrl_flags) if has_xbrl), None)
+        if not filing:
+            log.error("❌ No XBRL data found in recent filings")
+            return None
         
         # Step 3: Download XBRL file
-        print("\n3. Downloading XBRL file...")
+        log.info("\n3. Downloading XBRL file...")
         
         xbrl_file_path = sec_client.download_xbrl_for_filing(filing)
         
         if not xbrl_file_path:
-            print("❌ Failed to download XBRL file")
-            return False
+            log.error("❌ Failed to download XBRL file")
+            return None
         
-        print(f"✅ Downloaded XBRL file: {xbrl_file_path}")
+        log.info(f"✅ Downloaded XBRL file: {xbrl_file_path}")
         
         # Step 4: Parse XBRL file
-        print("\n4. Parsing XBRL file...")
-        
-        parser = SimpleXBRLParser(xbrl_file_path)
-        summary = parser.get_summary()
-        
-        print(f"✅ Parsed XBRL file successfully")
-        print(f"  - Total facts: {summary['total_facts']}")
-        print(f"  - Key metrics found: {summary['key_metrics_found']}")
+        log.info("\n4. Parsing XBRL file...")
+        
+        # Stream the facts and keep only the running totals, so a large 10-K
+        # instance is never held in memory as a whole. Facts whose context comes
+        # later in the file arrive out of order, so each metric keeps the match
+        # with the lowest document position
+        parser = SimpleXBRLParser(xbrl_file_path, load_facts=False)
+        total_facts = 0
+        key_metrics = {}
+        metric_positions = {}
+        
+        for position, fact in parser.iter_positioned_facts():
+            total_facts += 1
+            
+            for metric_name, pattern in KEY_CONCEPT_PATTERNS.items():
+                if metric_positions.get(metric_name, position) < position or not pattern.search(fact.concept_name):
+                    continue
+                
+                value = fact.value
+                if fact.is_monetary and value:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        continue
+                
+                key_metrics[metric_name] = {'value': value, 'unit': fact.unit}
+                metric_positions[metric_name] = position
+        
+        log.info(f"✅ Parsed XBRL file successfully")
+        log.info(f"  - Total facts: {total_facts}")
+        log.info(f"  - Key metrics found: {len(key_metrics)}")
         
         # Print key metrics
-        if summary['key_metrics']:
-            print("\n📊 Key Financial Metrics:")
-            for metric_name, metric_info in summary['key_metrics'].items():
+        if key_metrics:
+            log.info("\n📊 Key Financial Metrics:")
+            for metric_name, metric_info in key_metrics.items():
                 value = metric_info['value']
                 unit = metric_info['unit']
                 if isinstance(value, (int, float)):
-                    print(f"  - {metric_name.replace('_', ' ').title()}: {value:,} {unit}")
+                    log.info(f"  - {metric_name.replace('_', ' ').title()}: {value:,} {unit}")
                 else:
-                    print(f"  - {metric_name.replace('_', ' ').title()}: {value} {unit}")
+                    log.info(f"  - {metric_name.replace('_', ' ').title()}: {value} {unit}")
         
         # Step 5: Store in database (basic version)
-        print("\n5. Storing in database...")
+        log.info("\n5. Storing in database...")
         
-        with DatabaseManager() as db:
-            # Get or create company
-            company = db.get_or_create_company(
+        with DatabaseManager() as db, db.db.begin():
+            # Company and filing go in one transaction, committed once at the end
+            company_id = db.upsert_company(
                 name=filing.company_name,
                 cik=filing.cik,
                 symbol="AAPL"  # We know this is Apple
             )
             
-            # Create filing record
+            # The simplified schema has no XBRL columns, so only the filing row is stored
             db_filing = db.create_filing(
-                company_id=company.id,
+                company_id=company_id,
                 form_type=filing.form_type,
                 filing_date=filing.filing_date,
                 accession_number=filing.accession_number,
-                document_url=filing.document_url
+                document_url=filing.document_url,
+                commit=False
             )
             
-            # Update with XBRL info
-            db_filing.xbrl_file_path = xbrl_file_path
-            db_filing.has_xbrl = True
-            db_filing.xbrl_processed = True
-            db.db.commit()
-            
-            print(f"✅ Stored filing in database (ID: {db_filing.id})")
+            filing_id = db_filing.id
+            log.info(f"✅ Stored filing in database (ID: {filing_id})")
             
-            # Store some key facts
-            facts_stored = 0
-            for metric_name, metric_info in summary['key_metrics'].items():
-                try:
-                    fact = db.create_xbrl_fact(
-                        filing_id=db_filing.id,
-                        concept_name=metric_info['concept'],
-                        value=str(metric_info['value']),
-                        unit_ref=metric_info['unit'],
-                        is_monetary=metric_info['unit'] == 'USD'
-                    )
-                    facts_stored += 1
-                except Exception as e:
-                    print(f"⚠️  Failed to store fact {metric_name}: {e}")
-            
-            print(f"✅ Stored {facts_stored} key facts in database")
-        
-        print("\n🎉 Full XBRL pipeline test completed successfully!")
-        print("\nNext steps:")
-        print("1. Add more companies")
-        print("2. Create comparison features")
-        print("3. Build frontend interface")
-        
-        return True
+            # Key facts stay in the XBRL file: the simplified schema has no fact table
+            log.info(f"✅ Parsed {len(key_metrics)} key facts (not stored, no fact table)")
+        
+        log.info("\n🎉 Full XBRL pipeline test completed successfully!")
+        log.info("\nNext steps:")
+        log.info("1. Add more companies")
+        log.info("2. Create comparison features")
+        log.info("3. Build frontend interface")
+        
+        return {
+            'accession_number': filing.accession_number,
+            'filing_date': filing.filing_date,
+            'xbrl_file_path': xbrl_file_path,
+            'total_facts': total_facts,
+            'key_metrics': key_metrics,
+            'filing_id': filing_id
+        }
         
     except Exception as e:
-        print(f"❌ Test failed: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
+        log.exception(f"❌ Test failed: {e}")
+        return None
 
 if __name__ == "__main__":
-    test_real_xbrl_data()
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='Test downloading and parsing real XBRL data')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Only report errors')
+    args = parser.parse_args()
+    
+    if args.quiet:
+        log.setLevel(logging.ERROR)
+    
+    result = test_real_xbrl_data()
+    sys.stdout.flush()
+    sys.exit(0 if result else 1)
\ No newline at end of file
@@ -2,9 +2,14 @@
 """
 Test script to verify the system is working correctly
 """
+import io
 import sys
+import threading
 import requests
-import time
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
 
 # Add the backend directory to Python path
@@ -12,16 +17,67 @@ backend_dir = Path(__file__).parent.parent / "backend"
 sys.path.insert(0, str(backend_dir))
 
 from database import DatabaseManager
-from services.sec_client import SECClient
+from services.sec_client import get_sec_client
 from services.parser import FilingParser
 from config import settings
 
-def test_database():
+# Sample filing for the parser test, built once when the module loads
+_TEST_HTML = b"""
+<html>
+<head><title>Test Filing</title></head>
+<body>
+    <h1>FORM 10-K</h1>
+    <h2>Item 1A - Risk Factors</h2>
+    <p>Our business faces various risks including market volatility, 
+    regulatory changes, and competitive pressures. These risks could 
+    materially affect our financial results.</p>
+    
+    <h2>Item 1 - Business</h2>
+    <p>We operate in the technology sector, developing innovative 
+    solutions for our customers worldwide.</p>
+    
+    <table>
+        <tr><th>Assets</th><th>2023</th><th>2022</th></tr>
+        <tr><td>Cash</td><td>$100M</td><td>$80M</td></tr>
+        <tr><td>Total Assets</td><td>$500M</td><td>$450M</td></tr>
+    </table>
+</body>
+</html>
+"""
+
+# Older filings often leave <p> tags unclosed; the whole section must still be found
+_MALFORMED_TEST_HTML = b"""
+<html><body>
+<h1>FORM 10-K</h1>
+<h2>Item 1A - Risk Factors</h2>
+<p>Our business faces various risks including market volatility and regulatory changes.
+<p>Competitive pressures could materially affect our financial results in future periods.
+<p>Supply chain disruptions may also reduce our margins and delay product launches.
+<h2>Item 2 - Properties</h2>
+<p>We lease our headquarters.
+</body></html>
+"""
+
+# The tests run in threads, and a shared DatabaseManager's session must only be
+# used by one of them at a time
+_db_lock = threading.Lock()
+
+@contextmanager
+def _use_database(db_manager: DatabaseManager = None):
+    """Borrow the shared database manager, or open a private one if none is given"""
+    if db_manager is None:
+        with DatabaseManager() as db:
+            yield db
+    else:
+        with _db_lock:
+            yield db_manager
+
+def test_database(db_manager: DatabaseManager = None):
     """Test database connection and operations"""
     print("🗄️  Testing database...")
     
     try:
-        with DatabaseManager() as db:
+        with _use_database(db_manager) as db:
             companies = db.get_all_companies()
             print(f"  ✅ Database connected - found {len(companies)} companies")
             
@@ -40,7 +96,7 @@ def test_sec_client():
     print("🌐 Testing SEC client...")
     
     try:
-        client = SECClient()
+        client = get_sec_client()
         
         # Test with Apple (known to have filings)
         apple_cik = "0000320193"
@@ -63,41 +119,24 @@ def test_parser():
     print("📝 Testing HTML parser...")
     
     try:
-        # Create a simple test HTML
-        test_html = """
-        <html>
-        <head><title>Test Filing</title></head>
-        <body>
-            <h1>FORM 10-K</h1>
-            <h2>Item 1A - Risk Factors</h2>
-            <p>Our business faces various risks including market volatility, 
-            regulatory changes, and competitive pressures. These risks could 
-            materially affect our financial results.</p>
-            
-            <h2>Item 1 - Business</h2>
-            <p>We operate in the technology sector, developing innovative 
-            solutions for our customers worldwide.</p>
-            
-            <table>
-                <tr><th>Assets</th><th>2023</th><th>2022</th></tr>
-                <tr><td>Cash</td><td>$100M</td><td>$80M</td></tr>
-                <tr><td>Total Assets</td><td>$500M</td><td>$450M</td></tr>
-            </table>
-        </body>
-        </html>
-        """
-        
-        parser = FilingParser(html_content=test_html)
+        parser = FilingParser(html_content=_TEST_HTML)
         sections = parser.extract_all_sections()
         
-        if sections:
-            print(f"  ✅ Successfully parsed {len(sections)} sections")
-            for section_type in sections.keys():
-                print(f"    - {section_type}")
-            return True
-        else:
+        if not sections:
             print("  ⚠️  No sections extracted")
             return False
+        
+        print(f"  ✅ Successfully parsed {len(sections)} sections")
+        for section_type in sections.keys():
+            print(f"    - {section_type}")
+        
+        risk_factors = FilingParser(html_content=_MALFORMED_TEST_HTML).extract_all_sections().get('risk_factors', '')
+        if 'Supply chain disruptions' not in risk_factors:
+            print(f"  ❌ Unclosed <p> tags cut risk factors short ({len(risk_factors)} chars)")
+            return False
+        
+        print("  ✅ Unclosed <p> tags parsed in full")
+        return True
             
     except Exception as e:
         print(f"  ❌ Parser test failed: {str(e)}")
@@ -109,9 +148,13 @@ def test_api(port=8000):
     
     base_url = f"http://localhost:{port}"
     
+    # One keep-alive session so the three checks share a connection
+    session = requests.Session()
+    session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=4))
+    
     try:
         # Test health endpoint
-        response = requests.get(f"{base_url}/health", timeout=5)
+        response = session.get(f"{base_url}/health", timeout=5)
         if response.status_code == 200:
             print("  ✅ Health endpoint working")
         else:
@@ -119,7 +162,7 @@ def test_api(port=8000):
             return False
         
         # Test companies endpoint
-        response = requests.get(f"{base_url}/companies", timeout=5)
+        response = session.get(f"{base_url}/companies", timeout=5)
         if response.status_code == 200:
             companies = response.json()
             print(f"  ✅ Companies endpoint working - found {len(companies)} companies")
@@ -128,7 +171,7 @@ def test_api(port=8000):
             return False
         
         # Test filings endpoint
-        response = requests.get(f"{base_url}/filings?limit=5", timeout=5)
+        response = session.get(f"{base_url}/filings?limit=5", timeout=5)
         if response.status_code == 200:
             filings = response.json()
             print(f"  ✅ Filings endpoint working - found {len(filings)} filings")
@@ -144,6 +187,8 @@ def test_api(port=8000):
     except Exception as e:
         print(f"  ❌ API test failed: {str(e)}")
         return False
+    finally:
+        session.close()
 
 def test_config():
     """Test configuration"""
@@ -170,45 +215,82 @@ def test_config():
         print(f"  ❌ Configuration test failed: {str(e)}")
         return False
 
-def run_integration_test():
+def run_integration_test(db_manager: DatabaseManager = None):
     """Run a full integration test"""
     print("🔄 Running integration test...")
     
     try:
         # Test the full pipeline with a known company
-        with DatabaseManager() as db:
+        with _use_database(db_manager) as db:
             # Get or create a test company
             test_company = db.get_or_create_company(
                 name="Apple Inc.",
                 cik="0000320193",
                 symbol="AAPL"
             )
+            company_name, company_cik = test_company.name, test_company.cik
+        
+        print(f"  ✅ Test company: {company_name}")
+        
+        # Try to get latest filing (without downloading to avoid rate limits).
+        # The database isn't held meanwhile, so other tests can use it
+        sec_client = get_sec_client()
+        latest_filing = sec_client.get_latest_filing(company_cik, "10-K")
+        
+        if latest_filing:
+            print(f"  ✅ Found latest filing: {latest_filing.form_type} ({latest_filing.filing_date})")
             
-            print(f"  ✅ Test company: {test_company.name}")
-            
-            # Try to get latest filing (without downloading to avoid rate limits)
-            sec_client = SECClient()
-            latest_filing = sec_client.get_latest_filing(test_company.cik, "10-K")
-            
-            if latest_filing:
-                print(f"  ✅ Found latest filing: {latest_filing.form_type} ({latest_filing.filing_date})")
-                
-                # Check if we already have this filing
+            # Check if we already have this filing
+            with _use_database(db_manager) as db:
                 existing = db.get_filing_by_accession(latest_filing.accession_number)
-                if not existing:
-                    print("  ✅ This would be a new filing to process")
-                else:
-                    print("  ✅ Filing already exists in database")
-                
-                return True
+            if not existing:
+                print("  ✅ This would be a new filing to process")
             else:
-                print("  ⚠️  No recent filings found (may be rate limited)")
-                return False
+                print("  ✅ Filing already exists in database")
+            
+            return True
+        else:
+            print("  ⚠️  No recent filings found (may be rate limited)")
+            return False
                 
     except Exception as e:
         print(f"  ❌ Integration test failed: {str(e)}")
         return False
 
+class _ThreadCapturedStdout:
+    """
+    stdout replacement that sends each thread's prints to its own buffer
+    
+    contextlib.redirect_stdout swaps sys.stdout for the whole process, so
+    tests running side by side would interleave their output. Threads without
+    a buffer write straight through to the real stream.
+    """
+    
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+    
+    def _target(self):
+        return getattr(self._local, 'buffer', None) or self._stream
+    
+    def write(self, text):
+        return self._target().write(text)
+    
+    def flush(self):
+        self._target().flush()
+    
+    def __getattr__(self, name):
+        # encoding, isatty, fileno and the rest come from the current target
+        return getattr(self._target(), name)
+    
+    def capture(self, test_func):
+        """Run test_func with this thread's prints collected, return (result, output)"""
+        self._local.buffer = io.StringIO()
+        try:
+            return test_func(), self._local.buffer.getvalue()
+        finally:
+            self._local.buffer = None
+
 def print_getting_started():
     """Print getting started instructions"""
     print("\n🎯 Getting Started:")
@@ -233,44 +315,53 @@ def main():
     print("🧪 SEC Filing Analyzer - System Test")
     print("=" * 50)
     
+    # One database manager (and session) serves every test in the run
+    db_manager = DatabaseManager()
+    
     tests = [
         ("Configuration", test_config),
-        ("Database", test_database),
+        ("Database", partial(test_database, db_manager)),
         ("SEC Client", test_sec_client),
         ("HTML Parser", test_parser),
-        ("Integration", run_integration_test)
+        ("Integration", partial(run_integration_test, db_manager)),
+        ("API Server", test_api)
     ]
     
-    results = {}
-    
-    for test_name, test_func in tests:
-        print(f"\n{test_name}:")
-        print("-" * 20)
-        results[test_name] = test_func()
-        time.sleep(1)  # Brief pause between tests
-    
-    # Test API if it's running
-    print(f"\nAPI Server:")
-    print("-" * 20)
-    results["API Server"] = test_api()
-    
-    # Print summary
-    print(f"\n📊 Test Summary:")
-    print("=" * 50)
-    
-    passed = 0
-    for test_name, result in results.items():
-        status = "✅ PASS" if result else "❌ FAIL"
-        print(f"{test_name:<15} {status}")
-        if result:
-            passed += 1
+    # The tests don't depend on each other and mostly wait on the database or
+    # SEC, so run them side by side and print each one's output as a block
+    stdout = _ThreadCapturedStdout(sys.stdout)
+    sys.stdout = stdout
+    try:
+        with db_manager, ThreadPoolExecutor(max_workers=len(tests)) as executor:
+            futures = {
+                test_name: executor.submit(stdout.capture, test_func)
+                for test_name, test_func in tests
+            }
+            
+            results = {}
+            for test_name, future in futures.items():
+                results[test_name], output = future.result()
+                print(f"\n{test_name}:")
+                print("-" * 20)
+                print(output, end="")
+    finally:
+        sys.stdout = stdout._stream
     
-    print(f"\nTotal: {passed}/{len(results)} tests passed")
+    # Build the summary and print it in one go
+    passed = sum(1 for result in results.values() if result)
+    summary = [f"\n📊 Test Summary:", "=" * 50]
+    summary += [
+        f"{test_name:<15} {'✅ PASS' if result else '❌ FAIL'}"
+        for test_name, result in results.items()
+    ]
+    summary.append(f"\nTotal: {passed}/{len(results)} tests passed")
     
     if passed == len(results):
-        print("\n🎉 All tests passed! Your system is ready to go.")
+        summary.append("\n🎉 All tests passed! Your system is ready to go.")
     else:
-        print(f"\n⚠️  {len(results) - passed} test(s) failed. Check the errors above.")
+        summary.append(f"\n⚠️  {len(results) - passed} test(s) failed. Check the errors above.")
+    
+    print("\n".join(summary))
     
     # Print getting started guide if basic tests pass
     if results.get("Configuration") and results.get("Database"):